@@ -0,0 +1,187 @@
+"""Benchmarks of the decode and request hot paths.
+
+Run from the repository root:
+
+    python benchmarks/bench.py --output bench.json
+    python benchmarks/bench.py --compare bench.json
+
+With --compare the script exits with status 1 if a benchmark got slower than the
+threshold compared to the earlier results file.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bwt_api import __version__  # noqa: E402
+from bwt_api import smart_dos_api  # noqa: E402
+from bwt_api.bwt import BwtModel, determine_bwt_model  # noqa: E402
+from bwt_api.bwt_api import _CURRENT_FIELDS, BwtApi  # noqa: E402
+from bwt_api.codec import EncodedSeries  # noqa: E402
+from bwt_api.fleet import FleetHost, FleetPoller  # noqa: E402
+from bwt_api.testing import StaticSession  # noqa: E402
+from bwt_api.simulator import (  # noqa: E402
+    CURRENT_DATA, DAILY_DATA, GATT, MONTHLY_DATA, YEARLY_DATA, DeviceSimulator, SimulatedDevice,
+)
+from bwt_api.smart_dos_api import BwtSmartDosApi  # noqa: E402
+
+
+def _measure(func, min_time: float) -> dict:
+    """Call func repeatedly for at least min_time seconds."""
+    iterations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for _ in range(100):
+            func()
+        iterations += 100
+        elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "mean_us": elapsed / iterations * 1e6, "ops_per_sec": iterations / elapsed}
+
+
+async def _measure_async(func, min_time: float, batch: int = 100) -> dict:
+    iterations = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for _ in range(batch):
+            await func()
+        iterations += batch
+        elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "mean_us": elapsed / iterations * 1e6, "ops_per_sec": iterations / elapsed}
+
+
+def bench_decode(min_time: float) -> dict:
+    results = {}
+    api = BwtApi("host", "code", session=StaticSession({}))
+    results["convert_datetime"] = _measure(lambda: api._convert_datetime("2023-11-16 04:42:15"), min_time)
+    raw = {**CURRENT_DATA, "ActiveErrorIDs": "5,32,34,29"}
+    parse_errors = _CURRENT_FIELDS["errors"]
+    results["current_errors"] = _measure(lambda: parse_errors(raw), min_time)
+    results["smart_dos_remaining_capacity"] = _measure(
+        lambda: smart_dos_api._parse_remaining_capacity(GATT["0402"]), min_time
+    )
+    results["smart_dos_treated_water"] = _measure(
+        lambda: smart_dos_api._parse_treated_water(GATT["0503"]), min_time
+    )
+    return results
+
+
+def bench_codec(min_time: float) -> dict:
+    results = {}
+    # One day of 10 second samples of a slowly growing counter
+    rng = random.Random(0)
+    values = [318383]
+    for _ in range(8640 - 1):
+        values.append(values[-1] + rng.choice([0, 0, 0, 0, 1, 2]))
+    encoded = EncodedSeries.encode(values)
+    results["codec_encode_day"] = _measure(lambda: EncodedSeries.encode(values), min_time)
+    results["codec_decode_day"] = _measure(encoded.decode, min_time)
+    results["codec_random_access"] = _measure(lambda: encoded[rng.randrange(len(values))], min_time)
+    results["codec_encode_day"]["ratio"] = encoded.nbytes / (8 * len(values))
+    return results
+
+
+async def bench_api(min_time: float) -> dict:
+    results = {}
+    session = StaticSession({
+        "api/GetCurrentData": CURRENT_DATA,
+        "api/GetDailyData": DAILY_DATA,
+        "api/GetMonthlyData": MONTHLY_DATA,
+        "api/GetYearlyData": YEARLY_DATA,
+        **{f"api/v1/gatt/{uuid}": value for uuid, value in GATT.items()},
+    })
+    api = BwtApi("host", "code", session=session)
+    results["get_current_data"] = await _measure_async(api.get_current_data, min_time)
+    results["get_daily_data"] = await _measure_async(api.get_daily_data, min_time)
+    results["get_monthly_data"] = await _measure_async(api.get_monthly_data, min_time)
+    results["get_yearly_data"] = await _measure_async(api.get_yearly_data, min_time)
+    dos = BwtSmartDosApi("host", session=session)
+    results["smart_dos_get_snapshot"] = await _measure_async(dos.get_snapshot, min_time)
+    return results
+
+
+async def bench_simulator(min_time: float, devices: int) -> dict:
+    results = {}
+    models = {"perla": BwtModel.PERLA_LOCAL_API, "silk": BwtModel.PERLA_SILK, "dos": BwtModel.SMART_DOS}
+    async with DeviceSimulator() as sim:
+        for name, model in models.items():
+            sim.add(f"{name}.sim", SimulatedDevice(model))
+        async with sim.session() as session:
+            for name in models:
+                results[f"determine_bwt_model_{name}"] = await _measure_async(
+                    lambda: determine_bwt_model(f"{name}.sim", session=session), min_time, batch=10
+                )
+
+        hosts = []
+        for i in range(devices):
+            sim.add(f"fleet-{i}.sim", SimulatedDevice(BwtModel.PERLA_LOCAL_API))
+            hosts.append(FleetHost(f"fleet-{i}.sim", BwtModel.PERLA_LOCAL_API, code="code"))
+        async with sim.session(limit=100) as session:
+            async with FleetPoller(hosts, concurrency=100, session=session) as poller:
+                start = time.perf_counter()
+                failed = sum([not result.ok async for result in poller.poll()])
+                elapsed = time.perf_counter() - start
+        results["fleet_poll"] = {
+            "iterations": devices, "mean_us": elapsed / devices * 1e6, "ops_per_sec": devices / elapsed,
+            "failed": failed,
+        }
+    return results
+
+
+def compare(results: dict, previous: dict, threshold: float) -> list[str]:
+    """Names of the benchmarks that lost more than threshold of their throughput."""
+    regressions = []
+    for name, result in results.items():
+        before = previous.get("results", {}).get(name)
+        if before is not None and result["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {before['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f} ops/s"
+            )
+    return regressions
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description="bwt_api benchmarks")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed throughput loss, default 0.2")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--devices", type=int, default=500, help="simulated devices for the fleet poll")
+    args = parser.parse_args(args)
+
+    results = bench_decode(args.min_time)
+    results.update(bench_codec(args.min_time))
+    results.update(asyncio.run(bench_api(args.min_time)))
+    results.update(asyncio.run(bench_simulator(args.min_time, args.devices)))
+    for name, result in results.items():
+        print(f"{name:32} {result['mean_us']:12.2f} us {result['ops_per_sec']:14.0f} ops/s")
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
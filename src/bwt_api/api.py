@@ -3,8 +3,22 @@
 from bwt_api.bwt_api import BwtApi
 from bwt_api.silk_api import BwtSilkApi
 from bwt_api.smart_dos_api import BwtSmartDosApi
+from bwt_api.fleet import FleetErrors, FleetHost, FleetPoller, FleetResult
+from bwt_api.coordinator import PollingCoordinator
+from bwt_api.series import treated_to_blended_batch
 
-__all__ = ["BwtApi", "BwtSilkApi", "BwtSmartDosApi"]
+__all__ = [
+    "BwtApi",
+    "BwtSilkApi",
+    "BwtSmartDosApi",
+    "FleetErrors",
+    "FleetHost",
+    "FleetPoller",
+    "FleetResult",
+    "PollingCoordinator",
+    "treated_to_blended",
+    "treated_to_blended_batch",
+]
 
 def treated_to_blended(treated: int, hardness_in: int, hardness_out: int) -> float:
     if hardness_in == 0 or hardness_in == hardness_out:
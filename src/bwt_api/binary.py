@@ -0,0 +1,284 @@
+"""Versioned binary format of the response data objects.
+
+Every record type has a fixed layout packed with struct, so many records fit in one
+buffer and are read back without parsing:
+
+    data = pack_many(responses)
+    responses = unpack_many(data)
+
+A buffer starts with a header of magic, format version, record type and number of
+records, buffers of other versions are rejected. Errors are stored as a bitset of
+their ids (-1 to 126) like bwt_api.error, so they come back sorted by id. Datetimes
+are stored as seconds since 1970 of their wall clock time, like the devices report
+them. Strings have a fixed maximum size in UTF-8 and None is stored as a single 0xff
+byte. Values that do not fit raise ValueError on packing.
+"""
+
+import calendar
+import struct
+from array import array
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from bwt_api.data import (
+    BwtStatus,
+    ConfigurationResponse,
+    CurrentResponse,
+    DailyResponse,
+    DeviceInfoResponse,
+    Hardness,
+    MonthlyResponse,
+    PouchInfoResponse,
+    RemainingCapacityResponse,
+    SmartDosStatus,
+    SubstanceDosageResponse,
+    SubstanceType,
+    TimeResponse,
+    TreatedWaterResponse,
+    WifiResponse,
+    YearlyResponse,
+)
+from bwt_api.error import BwtError, error_mask, mask_errors
+from bwt_api.series import TYPECODE
+
+VERSION = 2
+
+_MAGIC = b"BWTB"
+# magic, version, record type, number of records
+_HEADER = struct.Struct("<4sBBI")
+_EPOCH = datetime(1970, 1, 1)
+_NONE = b"\xff"  # never the first byte of UTF-8
+_MAX_STATES = 8
+
+
+@dataclass(frozen=True)
+class _Layout:
+    type_id: int
+    record: struct.Struct
+    pack: Callable[[Any], tuple]
+    unpack: Callable[[tuple], Any]
+
+
+def _pack_errors(errors: Sequence[BwtError]) -> bytes:
+    try:
+        return error_mask(errors).to_bytes(16, "little")
+    except OverflowError:
+        raise ValueError(f"Error ids {[error.value for error in errors]} do not fit the bitset") from None
+
+
+def _unpack_errors(data: bytes) -> list[BwtError]:
+    return mask_errors(int.from_bytes(data, "little"))
+
+
+def _pack_datetime(value: datetime) -> int:
+    return calendar.timegm(value.timetuple())
+
+
+def _unpack_datetime(value: int) -> datetime:
+    return _EPOCH + timedelta(seconds=value)
+
+
+def _pack_str(value: str | None, size: int) -> bytes:
+    if value is None:
+        return _NONE
+    data = value.encode("utf-8")
+    if len(data) > size or b"\x00" in data:
+        raise ValueError(f"{value!r} does not fit {size} bytes")
+    return data
+
+
+def _unpack_str(data: bytes) -> str | None:
+    if data[:1] == _NONE:
+        return None
+    return data.rstrip(b"\x00").decode("utf-8")
+
+
+def _pack_states(states: Sequence[SmartDosStatus | None]) -> tuple:
+    if len(states) > _MAX_STATES:
+        raise ValueError(f"More than {_MAX_STATES} active states")
+    values = [0 if state is None else state.value for state in states]
+    return (len(states), *values, *[0] * (_MAX_STATES - len(states)))
+
+
+def _unpack_states(count: int, values: Sequence[int]) -> list[SmartDosStatus | None]:
+    return [SmartDosStatus(value) if value else None for value in values[:count]]
+
+
+def _current(r: CurrentResponse) -> tuple:
+    return (
+        _pack_errors(r.errors), r.blended_total, r.capacity_1, r.capacity_2, r.current_flow,
+        r.dosing_total, _pack_str(r.firmware_version, 16),
+        r.in_hardness.caco3, r.in_hardness.dH, r.in_hardness.fH, r.in_hardness.mmol,
+        r.out_hardness.caco3, r.out_hardness.dH, r.out_hardness.fH, r.out_hardness.mmol,
+        r.holiday_mode, _pack_datetime(r.regeneration_last_1), _pack_datetime(r.regeneration_last_2),
+        _pack_datetime(r.service_customer), _pack_datetime(r.service_technician), r.out_of_service,
+        r.regeneration_count_1, r.regeneration_count_2, r.regeneration_count, r.regenerativ_level,
+        r.regenerativ_days, r.regenerativ_total, r.state.value, r.treated_day, r.treated_month,
+        r.treated_year, r.columns,
+    )
+
+
+def _current_response(v: tuple) -> CurrentResponse:
+    return CurrentResponse(
+        _unpack_errors(v[0]), v[1], v[2], v[3], v[4], v[5], _unpack_str(v[6]),
+        Hardness(*v[7:11]), Hardness(*v[11:15]), v[15],
+        _unpack_datetime(v[16]), _unpack_datetime(v[17]), _unpack_datetime(v[18]), _unpack_datetime(v[19]),
+        *v[20:27], BwtStatus(v[27]), *v[28:32],
+    )
+
+
+def _wifi(r: WifiResponse) -> tuple:
+    return (
+        _pack_str(r.ssid, 32), r.rssi, _pack_str(r.rssiAvg, 8), _pack_str(r.rssiSig, 8), r.dhcp,
+        *(_pack_str(value, 46) for value in (r.ip, r.sn, r.sg, r.pDns, r.sDns)), _pack_str(r.mac, 18),
+    )
+
+
+def _wifi_response(v: tuple) -> WifiResponse:
+    return WifiResponse(
+        _unpack_str(v[0]), v[1], _unpack_str(v[2]), _unpack_str(v[3]), v[4],
+        *(_unpack_str(value) for value in v[5:11]),
+    )
+
+
+def _device_info(r: DeviceInfoResponse) -> tuple:
+    return (
+        _pack_str(r.fw_rev, 16), _pack_str(r.hw_rev, 16), _pack_str(r.product_code, 16), r.uptime,
+        r.operating_time, 0 if r.dev_state is None else r.dev_state.value, *_pack_states(r.active_states),
+        _pack_str(r.comm_date, 32), _pack_str(r.device_id, 64), _pack_str(r.device_type, 16),
+        _pack_str(r.device_variant, 16), r.total_flow, r.total_dosed,
+    )
+
+
+def _device_info_response(v: tuple) -> DeviceInfoResponse:
+    return DeviceInfoResponse(
+        fw_rev=_unpack_str(v[0]),
+        hw_rev=_unpack_str(v[1]),
+        product_code=_unpack_str(v[2]),
+        uptime=v[3],
+        operating_time=v[4],
+        dev_state=SmartDosStatus(v[5]) if v[5] else None,
+        active_states=_unpack_states(v[6], v[7:7 + _MAX_STATES]),
+        comm_date=_unpack_str(v[15]),
+        device_id=_unpack_str(v[16]),
+        device_type=_unpack_str(v[17]),
+        device_variant=_unpack_str(v[18]),
+        total_flow=v[19],
+        total_dosed=v[20],
+    )
+
+
+def _configuration(r: ConfigurationResponse) -> tuple:
+    return (
+        r.buzzer_en, r.dosing_rate, r.aqa_volume_en, r.aqa_watch_en, r.aqa_max_flow_en, r.aqa_volume_val,
+        r.volume_per_stroke, r.pouch_empty_timeout, r.pouch_not_empty_timeout, r.aqa_watch_val,
+        r.aqa_max_flow_val, r.rest_server_en,
+    )
+
+
+def _pouch_info(r: PouchInfoResponse) -> tuple:
+    return (
+        r.tot_cap, _pack_str(r.exp_date, 16), r.order_nr, r.batch_nr,
+        0 if r.substance_type is None else r.substance_type.value, r.unit,
+    )
+
+
+def _pouch_info_response(v: tuple) -> PouchInfoResponse:
+    return PouchInfoResponse(v[0], _unpack_str(v[1]), v[2], v[3], SubstanceType(v[4]) if v[4] else None, v[5])
+
+
+def _series(response_type: type, size: int, type_id: int) -> _Layout:
+    return _Layout(
+        type_id,
+        struct.Struct(f"<{size}i"),
+        lambda r: tuple(r.values),
+        lambda v: response_type(array(TYPECODE, v)),
+    )
+
+
+_LAYOUTS: dict[type, _Layout] = {
+    CurrentResponse: _Layout(1, struct.Struct("<16sqqqiq16s8iq4qi5iqB3iB"), _current, _current_response),
+    DailyResponse: _series(DailyResponse, 48, 2),
+    MonthlyResponse: _series(MonthlyResponse, 31, 3),
+    YearlyResponse: _series(YearlyResponse, 12, 4),
+    WifiResponse: _Layout(5, struct.Struct("<32si8s8s?46s46s46s46s46s18s"), _wifi, _wifi_response),
+    DeviceInfoResponse: _Layout(
+        6, struct.Struct(f"<16s16s16sqqHB{_MAX_STATES}H32s64s16s16sqq"), _device_info, _device_info_response
+    ),
+    ConfigurationResponse: _Layout(
+        7, struct.Struct("<?d???ddqqqd?"), _configuration, lambda v: ConfigurationResponse(*v)
+    ),
+    TimeResponse: _Layout(
+        8, struct.Struct("<q64s"),
+        lambda r: (r.time, _pack_str(r.timezone, 64)),
+        lambda v: TimeResponse(v[0], _unpack_str(v[1])),
+    ),
+    PouchInfoResponse: _Layout(9, struct.Struct("<d16sqqBq"), _pouch_info, _pouch_info_response),
+    RemainingCapacityResponse: _Layout(
+        10, struct.Struct("<ddqq"),
+        lambda r: (r.rem_capacity, r.rem_capacity_pct, r.rem_capacity_days, r.unit),
+        lambda v: RemainingCapacityResponse(*v),
+    ),
+    TreatedWaterResponse: _Layout(
+        11, struct.Struct("<qq"),
+        lambda r: (r.total_flow, r.total_ticks),
+        lambda v: TreatedWaterResponse(*v),
+    ),
+    SubstanceDosageResponse: _Layout(
+        12, struct.Struct("<d"),
+        lambda r: (r.dosed_mineral,),
+        lambda v: SubstanceDosageResponse(*v),
+    ),
+}
+_LAYOUTS_BY_ID = {layout.type_id: layout for layout in _LAYOUTS.values()}
+
+
+def pack_many(responses: Sequence[Any]) -> bytes:
+    """Pack responses of one type into a buffer."""
+    if not responses:
+        raise ValueError("Nothing to pack")
+    layout = _LAYOUTS.get(type(responses[0]))
+    if layout is None:
+        raise TypeError(f"No binary format for {type(responses[0]).__name__}")
+    record = layout.record
+    data = bytearray(_HEADER.size + record.size * len(responses))
+    _HEADER.pack_into(data, 0, _MAGIC, VERSION, layout.type_id, len(responses))
+    offset = _HEADER.size
+    for response in responses:
+        if type(response) is not type(responses[0]):
+            raise TypeError(f"Cannot pack {type(response).__name__} with {type(responses[0]).__name__}")
+        try:
+            record.pack_into(data, offset, *layout.pack(response))
+        except struct.error as e:
+            raise ValueError(f"{response} does not fit the binary format: {e}") from e
+        offset += record.size
+    return bytes(data)
+
+
+def unpack_many(data: bytes) -> list[Any]:
+    """Unpack all responses of a buffer."""
+    magic, version, type_id, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not a binary response buffer")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary format version {version}")
+    layout = _LAYOUTS_BY_ID.get(type_id)
+    if layout is None:
+        raise ValueError(f"Unknown record type {type_id}")
+    end = _HEADER.size + layout.record.size * count
+    if len(data) != end:
+        raise ValueError(f"Expected {end} bytes for {count} records, got {len(data)}")
+    return [layout.unpack(values) for values in layout.record.iter_unpack(memoryview(data)[_HEADER.size:])]
+
+
+def pack(response: Any) -> bytes:
+    return pack_many([response])
+
+
+def unpack(data: bytes) -> Any:
+    responses = unpack_many(data)
+    if len(responses) != 1:
+        raise ValueError(f"Expected one record, got {len(responses)}")
+    return responses[0]
@@ -1,9 +1,15 @@
 """The BWT model check."""
 
 
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
 from enum import Enum
+
 import aiohttp
-import logging
 
 from bwt_api.exception import ConnectException
 
@@ -13,46 +19,184 @@ class BwtModel(Enum):
     PERLA_SILK = 2
     SMART_DOS = 3
 
-async def determine_bwt_model(host: str, logger: logging.Logger = logging.getLogger(__name__)) -> BwtModel:
-    """Determine the BWT model based on the api response."""
+
+@dataclass
+class CachedModel:
+    model: BwtModel
+    firmware: str | None  # only known for some models
+    last_seen: float  # unix timestamp of the last detection
+
+
+class ModelCache:
+    """On-disk cache of detected models, so known hosts can skip probing after a restart.
+
+    Changes made in an event loop are written by a background task in a worker
+    thread, changes made meanwhile are batched into one write. Await flush() before
+    exiting to be sure they are on disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_age: float | None = None,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ):
+        """Entries older than max_age seconds are ignored, None keeps them forever."""
+        self._path = path
+        self._max_age = max_age
+        self._logger = logger
+        self._entries: dict[str, CachedModel] = {}
+        self._dirty = False
+        self._saving: asyncio.Task | None = None
+        try:
+            with open(path) as f:
+                raw = json.load(f)
+            for host, entry in raw.items():
+                self._entries[host] = CachedModel(BwtModel[entry["model"]], entry["firmware"], entry["last_seen"])
+        except (OSError, ValueError, KeyError):
+            # Missing or broken cache file, start empty
+            pass
+
+    def get(self, host: str) -> CachedModel | None:
+        entry = self._entries.get(host)
+        if entry is None or (self._max_age is not None and time.time() - entry.last_seen > self._max_age):
+            return None
+        return entry
+
+    def put(self, host: str, model: BwtModel, firmware: str | None = None):
+        self._entries[host] = CachedModel(model, firmware, time.time())
+        self._schedule_save()
+
+    def remove(self, host: str):
+        if self._entries.pop(host, None) is not None:
+            self._schedule_save()
+
+    async def flush(self):
+        """Wait until all changes are written."""
+        if self._saving is not None:
+            await asyncio.shield(self._saving)
+
+    def _schedule_save(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to block, write right away
+            self._dirty = False
+            self._write(self._snapshot())
+            return
+        if self._saving is None:
+            self._saving = loop.create_task(self._save())
+
+    async def _save(self):
+        try:
+            while self._dirty:
+                self._dirty = False
+                await asyncio.to_thread(self._write, self._snapshot())
+        except OSError as e:
+            self._logger.warning("Could not write the model cache %s: %s", self._path, e)
+        finally:
+            self._saving = None
+
+    def _snapshot(self) -> dict:
+        return {
+            host: {"model": entry.model.name, "firmware": entry.firmware, "last_seen": entry.last_seen}
+            for host, entry in self._entries.items()
+        }
+
+    def _write(self, raw: dict):
+        # Written to a temporary file and renamed, so readers never see a partial file
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(raw, f)
+        os.replace(tmp, self._path)
+
+
+async def _probe_local_api(session, host, timeout, logger) -> tuple[BwtModel, str | None] | None:
+    """Recent BWT Perla models with local API."""
+    async with session.get(f"http://{host}:8080/api", timeout=timeout) as response:
+        res = await response.text()
+        logger.debug("Response from %s:8080/api: %s - %s", host, response.status, res)
+        if response.status == 404 and res == "Not Found":
+            logger.info("Detected BWT Perla model with local API at %s", host)
+            return BwtModel.PERLA_LOCAL_API, None
+    return None
+
+
+async def _probe_silk(session, host, timeout, logger) -> tuple[BwtModel, str | None] | None:
+    """Perla Silk with registers endpoint that returns a list of raw data."""
+    async with session.get(f"http://{host}:80/silk/registers", timeout=timeout) as response:
+        res = await response.text()
+        logger.debug("Response from %s:80/silk/registers: %s - %s", host, response.status, res)
+        if response.status == 200 and res.startswith("""{"params":["""):
+            logger.info("Detected BWT Perla model with Silk API at %s", host)
+            return BwtModel.PERLA_SILK, None
+    return None
+
+
+async def _probe_smart_dos(session, host, timeout, logger) -> tuple[BwtModel, str | None] | None:
+    """Smart Dos, the device info characteristic also contains the firmware."""
+    async with session.get(f"http://{host}:80/api/v1/gatt/0201", timeout=timeout) as response:
+        res = await response.text()
+        logger.debug("Response from %s:80/api/v1/gatt/0201: %s - %s", host, response.status, res)
+        if response.status == 200 and res.startswith("""{"""):
+            logger.info("Detected BWT Smart Dos model at %s", host)
+            try:
+                firmware = json.loads(res).get("fwRev")
+            except ValueError:
+                firmware = None
+            return BwtModel.SMART_DOS, firmware
+    return None
+
+
+async def determine_bwt_model(
+    host: str,
+    logger: logging.Logger = logging.getLogger(__name__),
+    cache: ModelCache | None = None,
+    session: aiohttp.ClientSession | None = None,
+) -> BwtModel:
+    """Determine the BWT model based on the api response.
+
+    All endpoints are probed concurrently and the first match wins. Hosts found in
+    the cache are not probed at all.
+    """
+
+    if cache is not None:
+        cached = cache.get(host)
+        if cached is not None:
+            logger.info("Using cached BWT model %s for host %s", cached.model, host)
+            return cached.model
 
     logger.info("Determining BWT model for host %s", host)
     timeout = aiohttp.ClientTimeout(total=3)
 
-    # Recent BWT Perla models with local API
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"http://{host}:8080/api", timeout=timeout) as response:
-                res = await response.text()
-                logger.debug("Response from %s:8080/api: %s - %s", host, response.status, res)
-                if response.status == 404 and res == "Not Found":
-                    logger.info("Detected BWT Perla model with local API at %s", host)
-                    return BwtModel.PERLA_LOCAL_API
-    except Exception:
-        pass
-
-    # Perla Silk with registers endpoint that returns a list of raw data
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"http://{host}:80/silk/registers", timeout=timeout) as response:
-                res = await response.text()
-                logger.debug("Response from %s:80/silk/registers: %s - %s", host, response.status, res)
-                if response.status == 200 and res.startswith("""{"params":["""):
-                    logger.info("Detected BWT Perla model with Silk API at %s", host)
-                    return BwtModel.PERLA_SILK
-    except Exception:
-        pass
-
-    # Smart Dos
+    own_session = session is None
+    if session is None:
+        session = aiohttp.ClientSession()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"http://{host}:80/api/v1/gatt/0201", timeout=timeout) as response:
-                res = await response.text()
-                logger.debug("Response from %s:80/api/v1/gatt/0201: %s - %s", host, response.status, res)
-                if response.status == 200 and res.startswith("""{"""):
-                    logger.info("Detected BWT Smart Dos model at %s", host)
-                    return BwtModel.SMART_DOS
-    except Exception:
-        pass
+        pending = {
+            asyncio.create_task(probe(session, host, timeout, logger))
+            for probe in (_probe_local_api, _probe_silk, _probe_smart_dos)
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    result = task.result()
+                    if result is not None:
+                        model, firmware = result
+                        if cache is not None:
+                            cache.put(host, model, firmware)
+                        return model
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+    finally:
+        if own_session:
+            await session.close()
 
     raise ConnectException(f"Could not determine BWT model for host {host}. Please check the connection or the host address.")
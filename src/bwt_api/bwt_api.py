@@ -1,28 +1,78 @@
 """The BWT API class."""
 
 import aiohttp
+import asyncio
 import base64
 import logging
+import time
+from array import array
+from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import datetime
+from typing import Any
 
-from bwt_api.error import BwtError
+from bwt_api.cache import ResponseCache
+from bwt_api.coalesce import RequestCoalescer
+from bwt_api.error import BwtError, error_mask
+from bwt_api.decode import DEFAULT_DECODER, JsonDecoder
 from bwt_api.exception import ApiException, ConnectException, WrongCodeException
 from bwt_api.data import CurrentResponse, DailyResponse, MonthlyResponse, YearlyResponse, Hardness, BwtStatus
+from bwt_api.retry import NO_RETRY, CircuitBreaker, RetryPolicy, call_with_retry
+from bwt_api.scheduler import HostScheduler
+from bwt_api.series import TYPECODE
+from bwt_api.timeout import DEFAULT_TIMEOUTS, Timeouts, current_timeouts
+from bwt_api.watch import AdaptiveInterval, poll
 
 
 class BwtApi:
     """BWT Api."""
     _session: aiohttp.ClientSession
+    _owns_session: bool
     _host: str
     _headers: dict[str, str]
 
-    def __init__(self, host, code, logger: logging.Logger = logging.getLogger(__name__)):
+    def __init__(
+        self,
+        host,
+        code,
+        logger: logging.Logger = logging.getLogger(__name__),
+        session: aiohttp.ClientSession | None = None,
+        connector: aiohttp.BaseConnector | None = None,
+        cache: ResponseCache | None = None,
+        coalescer: RequestCoalescer | None = None,
+        scheduler: HostScheduler | None = None,
+        timeouts: Timeouts = DEFAULT_TIMEOUTS,
+        retry: RetryPolicy = NO_RETRY,
+        circuit_breaker: CircuitBreaker | None = None,
+        decoder: JsonDecoder = DEFAULT_DECODER,
+    ):
+        """Create the api.
+
+        Pass a session (e.g. bwt_api.session.shared_session()) or a connector to share
+        connections between many api objects. A passed session is not closed by close().
+        With a cache, responses are reused according to its ttl per endpoint.
+        Concurrent calls of the same endpoint share one request, pass a coalescer to
+        share in-flight requests with other api objects of the same host.
+        A scheduler limits and prioritizes the requests sent to the device.
+        The timeouts can be overridden per call with bwt_api.timeout.deadline().
+        Failed requests are retried according to retry, a circuit breaker lets requests
+        to an unreachable host fail fast. The decoder parses the raw response bodies.
+        """
         self._host = host
         auth = f"user:{code}"
         base64_auth = base64.b64encode(auth.encode("ascii")).decode("ascii")
         self._headers = {"Authorization": f"Basic {base64_auth}"}
-        self._session = aiohttp.ClientSession(headers=self._headers)
-        self._logger = logger 
+        self._owns_session = session is None
+        if session is None:
+            session = aiohttp.ClientSession(connector=connector, connector_owner=connector is None)
+        self._session = session
+        self._cache = cache
+        self._coalescer = coalescer if coalescer is not None else RequestCoalescer()
+        self._scheduler = scheduler
+        self._timeouts = timeouts
+        self._retry = retry
+        self._circuit_breaker = circuit_breaker
+        self._decoder = decoder
+        self._logger = logger
 
     async def __aenter__(self):
         return self
@@ -31,19 +81,46 @@ class BwtApi:
         await self.close()
 
     async def close(self):
-        await self._session.close()
+        if self._owns_session:
+            await self._session.close()
 
     async def __get_data(self, endpoint):
+        """Internal method to fetch json from the endpoint, using the cache if configured."""
+        if self._cache is not None:
+            return await self._cache.get_or_load(self._host, endpoint, lambda: self.__load(endpoint))
+        return await self.__load(endpoint)
+
+    async def __load(self, endpoint):
+        """Internal method to join an in-flight request for the endpoint or start one."""
+        return await self._coalescer.run(
+            (self._host, endpoint),
+            lambda: call_with_retry(lambda: self.__fetch(endpoint), self._retry, self._circuit_breaker),
+        )
+
+    async def __fetch(self, endpoint):
+        """Internal method to send the request once the scheduler allows it."""
+        if self._scheduler is None:
+            return await self.__request(endpoint)
+        async with self._scheduler.slot(endpoint):
+            return await self.__request(endpoint)
+
+    async def __request(self, endpoint):
         """Internal method to fetch json from the endpoint and handle general errors."""
+        timeouts = current_timeouts(self._timeouts)
+        start = time.monotonic()
         try:
-            async with self._session.get(f"http://{self._host}:8080/api/{endpoint}") as response:
+            async with self._session.get(
+                f"http://{self._host}:8080/api/{endpoint}",
+                headers=self._headers,
+                timeout=timeouts.client_timeout(),
+            ) as response:
                 self._logger.debug(
                     "Response status: %s, content-type: %s",
                     response.status,
                     response.headers['content-type']
                 )
                 if response.status == 200:
-                    json = await response.json(content_type=None)
+                    json = self._decoder(await response.read())
                     self._logger.debug("Raw response: %s", json)
                     return json
                 else:
@@ -54,85 +131,166 @@ class BwtApi:
                     else:
                         self._logger.warning("Unknown response with status %s: %s", response.status, text)
                         raise ApiException(f"Unknown response: {text}")
-        except (aiohttp.ClientConnectorError, TimeoutError) as e:
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            raise timeouts.exceeded(e, time.monotonic() - start) from e
+        except aiohttp.ClientConnectorError as e:
             raise ConnectException from e
-        except (aiohttp.ContentTypeError, ValueError) as e:
+        except ValueError as e:
             raise ApiException from e
 
     def _convert_datetime(self, input: str) -> datetime:
-        # It looks like the device sends and even shows everything in local time
-        return datetime.strptime(input, "%Y-%m-%d %H:%M:%S")
+        return _convert_datetime(input)
 
     async def get_current_data(self) -> CurrentResponse:
         """Get the current state of the BWT."""
         self._logger.debug("Fetching current data from %s", self._host)
         raw = await self.__get_data("GetCurrentData")
-        errors = [BwtError(int(error)) for error in raw["ActiveErrorIDs"].split(",") if error]
-        if BwtError.UNKNOWN in errors:
+        response = CurrentResponse(**{name: decode(raw) for name, decode in _CURRENT_FIELDS.items()})
+        if BwtError.UNKNOWN in response.errors:
             self._logger.warning("Unknown error in current data response %s", raw['ActiveErrorIDs'])
-        perla_one = raw["CapacityColumn2_ml_dH"] == -1
+        return response
 
-        in_hardness = Hardness(
-            raw["HardnessIN_CaCO3"],
-            raw["HardnessIN_dH"],
-            raw["HardnessIN_fH"],
-            raw["HardnessIN_mmol_l"],
-        )
-        out_hardness = Hardness(
-            raw["HardnessOUT_CaCO3"],
-            raw["HardnessOUT_dH"],
-            raw["HardnessOUT_fH"],
-            raw["HardnessOUT_mmol_l"],
-        )
-        return CurrentResponse(
-            errors,
-            raw["BlendedWaterSinceSetup_l"],
-            raw["CapacityColumn1_ml_dH"],
-            raw["CapacityColumn2_ml_dH"],
-            raw["CurrentFlowrate_l_h"],
-            raw["DosingSinceSetup_ml"],
-            raw["FirmwareVersion"],
-            in_hardness,
-            out_hardness,
-            raw["HolidayModeStartTime"],
-            self._convert_datetime(raw["LastRegenerationColumn1"]),
-            self._convert_datetime(raw["LastRegenerationColumn2"]),
-            self._convert_datetime(raw["LastServiceCustomer"]),
-            self._convert_datetime(raw["LastServiceTechnican"]),
-            raw["OutOfService"],
-            raw["RegenerationCounterColumn1"],
-            raw["RegenerationCounterColumn2"],
-            raw["RegenerationCountSinceSetup"],
-            raw["RegenerativLevel"],
-            raw["RegenerativRemainingDays"],
-            raw["RegenerativSinceSetup_g"],
-            BwtStatus(int(raw["ShowError"])),
-            raw["WaterTreatedCurrentDay_l"],
-            raw["WaterTreatedCurrentMonth_l"],
-            raw["WaterTreatedCurrentYear_l"],
-            1 if perla_one else 2,
-        )
+    async def get_current_view(self) -> "CurrentResponseView":
+        """Get the current state of the BWT, decoding each field only when accessed."""
+        self._logger.debug("Fetching current data view from %s", self._host)
+        return CurrentResponseView(await self.__get_data("GetCurrentData"))
 
     async def get_daily_data(self) -> DailyResponse:
         """Get treated water of the current day."""
         self._logger.debug("Fetching daily data from %s", self._host)
         raw = await self.__get_data("GetDailyData")
-        keys = [
-            f"{min // 60:02}{min % 60:02}_{min // 60:02}{min % 60 + 29:02}_l"
-            for min in range(0, 1440, 30)
-        ]
-        return DailyResponse(list(map(lambda k: raw[k], keys)))
+        return DailyResponse(array(TYPECODE, map(raw.__getitem__, _DAILY_KEYS)))
 
     async def get_monthly_data(self) -> MonthlyResponse:
         """Get treated water of the current month."""
         self._logger.debug("Fetching monthly data from %s", self._host)
         raw = await self.__get_data("GetMonthlyData")
-        keys = [f"Day{day:02}_l" for day in range(1, 32)]
-        return MonthlyResponse(list(map(lambda k: raw[k], keys)))
+        return MonthlyResponse(array(TYPECODE, map(raw.__getitem__, _MONTHLY_KEYS)))
 
     async def get_yearly_data(self) -> YearlyResponse:
         """Get treated water of the current year."""
         self._logger.debug("Fetching yearly data from %s", self._host)
         raw = await self.__get_data("GetYearlyData")
-        keys = [f"Month{month:02}_l" for month in range(1, 13)]
-        return YearlyResponse(list(map(lambda k: raw[k], keys)))
+        return YearlyResponse(array(TYPECODE, map(raw.__getitem__, _YEARLY_KEYS)))
+
+    def watch(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        backoff: float = 2.0,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> AsyncIterator[CurrentResponse]:
+        """Poll the current data with an adaptive interval.
+
+        The interval drops to min_interval while water flows or the errors change and
+        grows by backoff up to max_interval while the device is idle. Connection and
+        api errors are logged and retried with the idle backoff, see watch.poll. sleep
+        waits between the polls.
+        """
+        return poll(
+            self.get_current_data,
+            lambda current, previous: current.current_flow != 0
+            or (previous is not None and current.errors != previous.errors),
+            AdaptiveInterval(min_interval, max_interval, backoff),
+            self._logger,
+            sleep,
+        )
+
+
+def _convert_datetime(input: str) -> datetime:
+    # It looks like the device sends and even shows everything in local time
+    return datetime.strptime(input, "%Y-%m-%d %H:%M:%S")
+
+
+# Keys of the series responses in value order
+_DAILY_KEYS = tuple(
+    f"{min // 60:02}{min % 60:02}_{min // 60:02}{min % 60 + 29:02}_l"
+    for min in range(0, 1440, 30)
+)
+_MONTHLY_KEYS = tuple(f"Day{day:02}_l" for day in range(1, 32))
+_YEARLY_KEYS = tuple(f"Month{month:02}_l" for month in range(1, 13))
+
+
+# CurrentResponse field -> decoder of the raw GetCurrentData response
+_CURRENT_FIELDS = {
+    "errors": lambda raw: [BwtError(int(error)) for error in raw["ActiveErrorIDs"].split(",") if error],
+    "blended_total": lambda raw: raw["BlendedWaterSinceSetup_l"],
+    "capacity_1": lambda raw: raw["CapacityColumn1_ml_dH"],
+    "capacity_2": lambda raw: raw["CapacityColumn2_ml_dH"],
+    "current_flow": lambda raw: raw["CurrentFlowrate_l_h"],
+    "dosing_total": lambda raw: raw["DosingSinceSetup_ml"],
+    "firmware_version": lambda raw: raw["FirmwareVersion"],
+    "in_hardness": lambda raw: Hardness(
+        raw["HardnessIN_CaCO3"],
+        raw["HardnessIN_dH"],
+        raw["HardnessIN_fH"],
+        raw["HardnessIN_mmol_l"],
+    ),
+    "out_hardness": lambda raw: Hardness(
+        raw["HardnessOUT_CaCO3"],
+        raw["HardnessOUT_dH"],
+        raw["HardnessOUT_fH"],
+        raw["HardnessOUT_mmol_l"],
+    ),
+    "holiday_mode": lambda raw: raw["HolidayModeStartTime"],
+    "regeneration_last_1": lambda raw: _convert_datetime(raw["LastRegenerationColumn1"]),
+    "regeneration_last_2": lambda raw: _convert_datetime(raw["LastRegenerationColumn2"]),
+    "service_customer": lambda raw: _convert_datetime(raw["LastServiceCustomer"]),
+    "service_technician": lambda raw: _convert_datetime(raw["LastServiceTechnican"]),
+    "out_of_service": lambda raw: raw["OutOfService"],
+    "regeneration_count_1": lambda raw: raw["RegenerationCounterColumn1"],
+    "regeneration_count_2": lambda raw: raw["RegenerationCounterColumn2"],
+    "regeneration_count": lambda raw: raw["RegenerationCountSinceSetup"],
+    "regenerativ_level": lambda raw: raw["RegenerativLevel"],
+    "regenerativ_days": lambda raw: raw["RegenerativRemainingDays"],
+    "regenerativ_total": lambda raw: raw["RegenerativSinceSetup_g"],
+    "state": lambda raw: BwtStatus(int(raw["ShowError"])),
+    "treated_day": lambda raw: raw["WaterTreatedCurrentDay_l"],
+    "treated_month": lambda raw: raw["WaterTreatedCurrentMonth_l"],
+    "treated_year": lambda raw: raw["WaterTreatedCurrentYear_l"],
+    # 2 for BWT Duo and 1 for BWT Perla One, which has no second column
+    "columns": lambda raw: 1 if raw["CapacityColumn2_ml_dH"] == -1 else 2,
+}
+
+
+class CurrentResponseView:
+    """Read-only view with the fields of CurrentResponse over the raw response.
+
+    Each field is decoded on first access and then cached, so reading only
+    current_flow skips the datetime and error parsing. It compares equal to a
+    CurrentResponse with the same values, but is not one: isinstance checks,
+    dataclasses.asdict and the binary, compact and storage formats need
+    to_response().
+    """
+
+    __hash__ = None
+
+    def __init__(self, raw: dict):
+        self._raw = raw
+
+    def __getattr__(self, name: str):
+        # Only called for fields not decoded yet
+        decode = _CURRENT_FIELDS.get(name)
+        if decode is None:
+            raise AttributeError(name)
+        value = decode(self._raw)
+        self.__dict__[name] = value
+        return value
+
+    def __repr__(self) -> str:
+        decoded = ", ".join(f"{name}={self.__dict__[name]!r}" for name in _CURRENT_FIELDS if name in self.__dict__)
+        return f"CurrentResponseView({decoded})"
+
+    @property
+    def error_mask(self) -> int:
+        """Bitmask of the active errors, see bwt_api.error."""
+        return error_mask(self.errors)
+
+    def __eq__(self, other):
+        if not isinstance(other, (CurrentResponse, CurrentResponseView)):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in _CURRENT_FIELDS)
+
+    def to_response(self) -> CurrentResponse:
+        """Decode all remaining fields into a CurrentResponse."""
+        return CurrentResponse(**{name: getattr(self, name) for name in _CURRENT_FIELDS})
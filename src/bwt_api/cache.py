@@ -0,0 +1,115 @@
+"""Opt-in response cache shared by the api classes."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0  # served expired while refreshing in the background
+    misses: int = 0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires: float
+
+
+class ResponseCache:
+    """LRU cache of raw responses keyed by (host, endpoint).
+
+    The endpoint is the api endpoint name (e.g. GetYearlyData), the Smart Dos UUID
+    (e.g. 0201) or "registers" for the Silk. One cache can be shared by many api objects.
+    """
+
+    def __init__(
+        self,
+        ttl: Mapping[str, float] | None = None,
+        default_ttl: float = 0,
+        max_entries: int = 1024,
+        stale_while_revalidate: bool = False,
+        logger: logging.Logger = logging.getLogger(__name__),
+    ):
+        """Create the cache.
+
+        ttl maps endpoints to their time to live in seconds, all others use default_ttl.
+        A ttl of 0 disables caching for the endpoint. With stale_while_revalidate an
+        expired value is returned at once while a background task refreshes it.
+        """
+        self._ttl = dict(ttl or {})
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._stale_while_revalidate = stale_while_revalidate
+        self._logger = logger
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        # Strong references to the background refreshes, so they are not collected mid-flight
+        self._refreshing: dict[tuple[str, str], asyncio.Task] = {}
+        self.stats = CacheStats()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def close(self):
+        """Cancel the background refreshes and wait until they are done."""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def clear(self):
+        self._entries.clear()
+
+    def invalidate(self, host: str, endpoint: str | None = None):
+        """Drop one endpoint or all endpoints of a host."""
+        if endpoint is not None:
+            self._entries.pop((host, endpoint), None)
+            return
+        for key in [key for key in self._entries if key[0] == host]:
+            del self._entries[key]
+
+    async def get_or_load(self, host: str, endpoint: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value or await load() and store its result."""
+        ttl = self._ttl.get(endpoint, self._default_ttl)
+        if ttl <= 0:
+            return await load()
+
+        key = (host, endpoint)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if time.monotonic() < entry.expires:
+                self.stats.hits += 1
+                return entry.value
+            if self._stale_while_revalidate:
+                self.stats.stale_hits += 1
+                if key not in self._refreshing:
+                    task = asyncio.create_task(self._refresh(key, ttl, load))
+                    self._refreshing[key] = task
+                return entry.value
+
+        self.stats.misses += 1
+        value = await load()
+        self._store(key, value, ttl)
+        return value
+
+    async def _refresh(self, key: tuple[str, str], ttl: float, load: Callable[[], Awaitable[Any]]):
+        try:
+            self._store(key, await load(), ttl)
+        except Exception as e:
+            # Keep serving the stale value, the next access tries again
+            self._logger.debug("Background refresh of %s failed: %r", key, e)
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _store(self, key: tuple[str, str], value: Any, ttl: float):
+        self._entries[key] = _Entry(value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
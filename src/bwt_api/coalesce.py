@@ -0,0 +1,34 @@
+"""Single-flight coalescing of identical concurrent requests."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class RequestCoalescer:
+    """Share one in-flight request between all concurrent callers with the same key.
+
+    Every caller gets the same result or exception. Cancelling one caller does not
+    cancel the request for the others. One coalescer can be shared by many api objects.
+    """
+
+    def __init__(self):
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def run(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(load())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._done(key, done))
+        return await asyncio.shield(flight)
+
+    def _done(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            flight.exception()
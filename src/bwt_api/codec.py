@@ -0,0 +1,155 @@
+"""Compression of integer sample streams like the cumulative counters.
+
+Counters such as blended_total or total_flow grow by similar amounts between
+samples, so the difference of consecutive differences is mostly 0 or small. Values
+are split into blocks; each block stores its first value, the first difference and
+then the delta of deltas, all zigzag encoded as varints. A block can be decoded
+without the ones before it, so single values are read in O(block size).
+
+    series = EncodedSeries()
+    for sample in samples:
+        series.append(sample.blended_total)
+    data = series.to_bytes()
+"""
+
+import struct
+from array import array
+from collections.abc import Iterable
+
+_MAGIC = b"BWTC"
+# magic, block size, number of values, number of blocks
+_HEADER = struct.Struct("<4sIQI")
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _write_varint(data: bytearray, value: int):
+    value = _zigzag(value)
+    while value > 0x7F:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _decode_block(data: bytes, offset: int, count: int) -> array:
+    values = array("q")
+    value = delta = 0
+    for index in range(count):
+        shift = zigzag = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            zigzag |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        number = (zigzag >> 1) ^ -(zigzag & 1)
+        if index == 0:
+            value = number
+        elif index == 1:
+            delta = number
+            value += delta
+        else:
+            delta += number
+            value += delta
+        values.append(value)
+    return values
+
+
+class EncodedSeries:
+    """Delta-of-delta and varint encoded integers, appendable and randomly accessible."""
+
+    def __init__(self, block_size: int = 1024):
+        if block_size < 1:
+            raise ValueError("block_size must be at least 1")
+        self.block_size = block_size
+        self._data = bytearray()
+        self._offsets = array("q")  # start of each block in the data
+        self._count = 0
+        self._last = 0
+        self._delta = 0
+
+    @classmethod
+    def encode(cls, values: Iterable[int], block_size: int = 1024) -> "EncodedSeries":
+        series = cls(block_size)
+        series.extend(values)
+        return series
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded values and block index in bytes."""
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+    def append(self, value: int):
+        position = self._count % self.block_size
+        if position == 0:
+            self._offsets.append(len(self._data))
+            _write_varint(self._data, value)
+        elif position == 1:
+            self._delta = value - self._last
+            _write_varint(self._data, self._delta)
+        else:
+            delta = value - self._last
+            _write_varint(self._data, delta - self._delta)
+            self._delta = delta
+        self._last = value
+        self._count += 1
+
+    def extend(self, values: Iterable[int]):
+        for value in values:
+            self.append(value)
+
+    def block(self, index: int) -> array:
+        """Values of one block."""
+        if not 0 <= index < len(self._offsets):
+            raise IndexError(index)
+        count = min(self.block_size, self._count - index * self.block_size)
+        return _decode_block(self._data, self._offsets[index], count)
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        block, position = divmod(index, self.block_size)
+        return self.block(block)[position]
+
+    def decode(self, start: int = 0, stop: int | None = None) -> array:
+        """Values from start to stop, decoding only the blocks in the range."""
+        if start < 0 or (stop is not None and stop < 0):
+            raise ValueError(f"Negative positions are not supported, got start={start}, stop={stop}")
+        stop = self._count if stop is None else min(stop, self._count)
+        values = array("q")
+        if start >= stop:
+            return values
+        first = start // self.block_size
+        for block in range(first, (stop - 1) // self.block_size + 1):
+            values.extend(self.block(block))
+        offset = first * self.block_size
+        return values[start - offset:stop - offset]
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(_MAGIC, self.block_size, self._count, len(self._offsets))
+        offsets = struct.pack(f"<{len(self._offsets)}q", *self._offsets)
+        return header + offsets + bytes(self._data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EncodedSeries":
+        magic, block_size, count, blocks = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not an encoded series")
+        series = cls(block_size)
+        series._offsets.extend(struct.unpack_from(f"<{blocks}q", data, _HEADER.size))
+        series._data = bytearray(data[_HEADER.size + 8 * blocks:])
+        series._count = count
+        if count:
+            # State to continue appending to the last block
+            tail = series.block(blocks - 1)
+            series._last = tail[-1]
+            series._delta = tail[-1] - tail[-2] if len(tail) > 1 else 0
+        return series
@@ -0,0 +1,409 @@
+"""Compact, immutable variants of the response data objects.
+
+The classes use __slots__, are frozen and hashable. Low cardinality values like
+firmware versions, hardness settings and error lists are shared between all
+instances with the same value, so long histories of samples need little memory.
+Convert with compact() and back with to_response().
+"""
+
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, TypeVar
+
+from bwt_api.data import (
+    BwtStatus,
+    ConfigurationResponse,
+    CurrentResponse,
+    DeviceInfoResponse,
+    Hardness,
+    PouchInfoResponse,
+    RemainingCapacityResponse,
+    SmartDosStatus,
+    SubstanceDosageResponse,
+    SubstanceType,
+    TimeResponse,
+    TreatedWaterResponse,
+    WifiResponse,
+)
+from bwt_api.error import BwtError
+
+T = TypeVar("T")
+
+# Shared instances of equal values, cleared when it grows beyond the limit
+_POOL_LIMIT = 65536
+_pool: dict[Any, Any] = {}
+
+
+def _shared(value: T) -> T:
+    """Return the shared instance equal to value."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if value is None:
+        return value
+    # The type is part of the key, so equal values of different types stay apart
+    key = (type(value), value)
+    shared = _pool.get(key)
+    if shared is None:
+        if len(_pool) >= _POOL_LIMIT:
+            _pool.clear()
+        _pool[key] = shared = value
+    return shared
+
+
+def _shared_str(value: str | None) -> str | None:
+    return None if value is None else sys.intern(value)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactHardness:
+    caco3: int  # ppm CACO3
+    dH: int  # dH
+    fH: int  # fH
+    mmol: int  # mmol / l
+
+    @classmethod
+    def from_response(cls, hardness: Hardness) -> "CompactHardness":
+        return _shared(cls(hardness.caco3, hardness.dH, hardness.fH, hardness.mmol))
+
+    def to_response(self) -> Hardness:
+        return Hardness(self.caco3, self.dH, self.fH, self.mmol)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactCurrentResponse:
+    errors: tuple[BwtError, ...]
+    blended_total: int  # l
+    capacity_1: int  # ml * dH
+    capacity_2: int  # ml * dH
+    current_flow: int  # l / h
+    dosing_total: int  # ml
+    firmware_version: str
+    in_hardness: CompactHardness
+    out_hardness: CompactHardness
+    holiday_mode: int  # -1 or 0: inactive, 1: active, unix timestamp: start in future
+    regeneration_last_1: datetime
+    regeneration_last_2: datetime
+    service_customer: datetime
+    service_technician: datetime
+    out_of_service: int
+    regeneration_count_1: int
+    regeneration_count_2: int
+    regeneration_count: int
+    regenerativ_level: int  # %
+    regenerativ_days: int  # days left
+    regenerativ_total: int  # g
+    state: BwtStatus
+    treated_day: int  # treated water current day
+    treated_month: int  # treated water current month
+    treated_year: int  # treated water current year
+    columns: int  # number of columns: 2 for BWT Duo and 1 for BWT Perla One
+
+    @classmethod
+    def from_response(cls, response: CurrentResponse) -> "CompactCurrentResponse":
+        return cls(
+            _shared(tuple(response.errors)),
+            response.blended_total,
+            response.capacity_1,
+            response.capacity_2,
+            response.current_flow,
+            response.dosing_total,
+            sys.intern(response.firmware_version),
+            CompactHardness.from_response(response.in_hardness),
+            CompactHardness.from_response(response.out_hardness),
+            response.holiday_mode,
+            _shared(response.regeneration_last_1),
+            _shared(response.regeneration_last_2),
+            _shared(response.service_customer),
+            _shared(response.service_technician),
+            response.out_of_service,
+            response.regeneration_count_1,
+            response.regeneration_count_2,
+            response.regeneration_count,
+            response.regenerativ_level,
+            response.regenerativ_days,
+            response.regenerativ_total,
+            response.state,
+            response.treated_day,
+            response.treated_month,
+            response.treated_year,
+            response.columns,
+        )
+
+    def to_response(self) -> CurrentResponse:
+        return CurrentResponse(
+            list(self.errors),
+            self.blended_total,
+            self.capacity_1,
+            self.capacity_2,
+            self.current_flow,
+            self.dosing_total,
+            self.firmware_version,
+            self.in_hardness.to_response(),
+            self.out_hardness.to_response(),
+            self.holiday_mode,
+            self.regeneration_last_1,
+            self.regeneration_last_2,
+            self.service_customer,
+            self.service_technician,
+            self.out_of_service,
+            self.regeneration_count_1,
+            self.regeneration_count_2,
+            self.regeneration_count,
+            self.regenerativ_level,
+            self.regenerativ_days,
+            self.regenerativ_total,
+            self.state,
+            self.treated_day,
+            self.treated_month,
+            self.treated_year,
+            self.columns,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactWifiResponse:
+    """UUID 0104: Wi-Fi Information"""
+    ssid: str
+    rssi: int
+    rssiAvg: str
+    rssiSig: str
+    dhcp: bool
+    ip: str | None
+    sn: str | None
+    sg: str | None
+    pDns: str | None
+    sDns: str | None
+    mac: str | None
+
+    @classmethod
+    def from_response(cls, response: WifiResponse) -> "CompactWifiResponse":
+        return cls(
+            sys.intern(response.ssid),
+            response.rssi,
+            sys.intern(response.rssiAvg),
+            sys.intern(response.rssiSig),
+            response.dhcp,
+            _shared_str(response.ip),
+            _shared_str(response.sn),
+            _shared_str(response.sg),
+            _shared_str(response.pDns),
+            _shared_str(response.sDns),
+            _shared_str(response.mac),
+        )
+
+    def to_response(self) -> WifiResponse:
+        return WifiResponse(
+            self.ssid, self.rssi, self.rssiAvg, self.rssiSig, self.dhcp,
+            self.ip, self.sn, self.sg, self.pDns, self.sDns, self.mac,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactDeviceInfoResponse:
+    """UUID 0201: Device Information"""
+    fw_rev: str
+    hw_rev: str
+    product_code: str
+    uptime: int  # seconds
+    operating_time: int  # seconds
+    dev_state: SmartDosStatus | None
+    active_states: tuple[SmartDosStatus | None, ...]
+    comm_date: str
+    device_id: str
+    device_type: str
+    device_variant: str
+    total_flow: int  # ml
+    total_dosed: int  # ml
+
+    @classmethod
+    def from_response(cls, response: DeviceInfoResponse) -> "CompactDeviceInfoResponse":
+        return cls(
+            sys.intern(response.fw_rev),
+            sys.intern(response.hw_rev),
+            sys.intern(response.product_code),
+            response.uptime,
+            response.operating_time,
+            response.dev_state,
+            _shared(tuple(response.active_states)),
+            sys.intern(response.comm_date),
+            sys.intern(response.device_id),
+            sys.intern(response.device_type),
+            sys.intern(response.device_variant),
+            response.total_flow,
+            response.total_dosed,
+        )
+
+    def to_response(self) -> DeviceInfoResponse:
+        return DeviceInfoResponse(
+            fw_rev=self.fw_rev,
+            hw_rev=self.hw_rev,
+            product_code=self.product_code,
+            uptime=self.uptime,
+            operating_time=self.operating_time,
+            dev_state=self.dev_state,
+            active_states=list(self.active_states),
+            comm_date=self.comm_date,
+            device_id=self.device_id,
+            device_type=self.device_type,
+            device_variant=self.device_variant,
+            total_flow=self.total_flow,
+            total_dosed=self.total_dosed,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactConfigurationResponse:
+    """UUID 0202: Configuration"""
+    buzzer_en: bool
+    dosing_rate: float  # ml/m³
+    aqa_volume_en: bool
+    aqa_watch_en: bool
+    aqa_max_flow_en: bool
+    aqa_volume_val: float  # l
+    volume_per_stroke: float  # ml
+    pouch_empty_timeout: int  # s
+    pouch_not_empty_timeout: int  # s
+    aqa_watch_val: int  # s
+    aqa_max_flow_val: float  # l/h
+    rest_server_en: bool
+
+    @classmethod
+    def from_response(cls, response: ConfigurationResponse) -> "CompactConfigurationResponse":
+        # Configurations rarely change, so all equal samples share one instance
+        return _shared(cls(
+            response.buzzer_en,
+            response.dosing_rate,
+            response.aqa_volume_en,
+            response.aqa_watch_en,
+            response.aqa_max_flow_en,
+            response.aqa_volume_val,
+            response.volume_per_stroke,
+            response.pouch_empty_timeout,
+            response.pouch_not_empty_timeout,
+            response.aqa_watch_val,
+            response.aqa_max_flow_val,
+            response.rest_server_en,
+        ))
+
+    def to_response(self) -> ConfigurationResponse:
+        return ConfigurationResponse(
+            buzzer_en=self.buzzer_en,
+            dosing_rate=self.dosing_rate,
+            aqa_volume_en=self.aqa_volume_en,
+            aqa_watch_en=self.aqa_watch_en,
+            aqa_max_flow_en=self.aqa_max_flow_en,
+            aqa_volume_val=self.aqa_volume_val,
+            volume_per_stroke=self.volume_per_stroke,
+            pouch_empty_timeout=self.pouch_empty_timeout,
+            pouch_not_empty_timeout=self.pouch_not_empty_timeout,
+            aqa_watch_val=self.aqa_watch_val,
+            aqa_max_flow_val=self.aqa_max_flow_val,
+            rest_server_en=self.rest_server_en,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactTimeResponse:
+    """UUID 0208: Time and Timezone"""
+    time: int  # unix timestamp
+    timezone: str
+
+    @classmethod
+    def from_response(cls, response: TimeResponse) -> "CompactTimeResponse":
+        return cls(response.time, sys.intern(response.timezone))
+
+    def to_response(self) -> TimeResponse:
+        return TimeResponse(self.time, self.timezone)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactPouchInfoResponse:
+    """UUID 0401: Pouch/Container Information"""
+    tot_cap: float  # ml
+    exp_date: str  # DD.MM.YYYY
+    order_nr: int
+    batch_nr: int
+    substance_type: SubstanceType | None
+    unit: int  # 0 = ml
+
+    @classmethod
+    def from_response(cls, response: PouchInfoResponse) -> "CompactPouchInfoResponse":
+        return _shared(cls(
+            response.tot_cap,
+            sys.intern(response.exp_date),
+            response.order_nr,
+            response.batch_nr,
+            response.substance_type,
+            response.unit,
+        ))
+
+    def to_response(self) -> PouchInfoResponse:
+        return PouchInfoResponse(
+            self.tot_cap, self.exp_date, self.order_nr, self.batch_nr, self.substance_type, self.unit
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactRemainingCapacityResponse:
+    """UUID 0402: Remaining Capacity"""
+    rem_capacity: float  # ml
+    rem_capacity_pct: float  # %
+    rem_capacity_days: int
+    unit: int  # 0 = ml
+
+    @classmethod
+    def from_response(cls, response: RemainingCapacityResponse) -> "CompactRemainingCapacityResponse":
+        return cls(response.rem_capacity, response.rem_capacity_pct, response.rem_capacity_days, response.unit)
+
+    def to_response(self) -> RemainingCapacityResponse:
+        return RemainingCapacityResponse(self.rem_capacity, self.rem_capacity_pct, self.rem_capacity_days, self.unit)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactTreatedWaterResponse:
+    """UUID 0503: Treated Water"""
+    total_flow: int  # ml
+    total_ticks: int
+
+    @classmethod
+    def from_response(cls, response: TreatedWaterResponse) -> "CompactTreatedWaterResponse":
+        return cls(response.total_flow, response.total_ticks)
+
+    def to_response(self) -> TreatedWaterResponse:
+        return TreatedWaterResponse(self.total_flow, self.total_ticks)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactSubstanceDosageResponse:
+    """UUID 0505: Substance Dosage"""
+    dosed_mineral: float  # ml
+
+    @classmethod
+    def from_response(cls, response: SubstanceDosageResponse) -> "CompactSubstanceDosageResponse":
+        return cls(response.dosed_mineral)
+
+    def to_response(self) -> SubstanceDosageResponse:
+        return SubstanceDosageResponse(self.dosed_mineral)
+
+
+_COMPACT_TYPES = {
+    Hardness: CompactHardness,
+    CurrentResponse: CompactCurrentResponse,
+    WifiResponse: CompactWifiResponse,
+    DeviceInfoResponse: CompactDeviceInfoResponse,
+    ConfigurationResponse: CompactConfigurationResponse,
+    TimeResponse: CompactTimeResponse,
+    PouchInfoResponse: CompactPouchInfoResponse,
+    RemainingCapacityResponse: CompactRemainingCapacityResponse,
+    TreatedWaterResponse: CompactTreatedWaterResponse,
+    SubstanceDosageResponse: CompactSubstanceDosageResponse,
+}
+
+
+def compact(response):
+    """Convert a response data object into its compact variant."""
+    compact_type = _COMPACT_TYPES.get(type(response))
+    if compact_type is None:
+        raise TypeError(f"No compact variant of {type(response).__name__}")
+    return compact_type.from_response(response)
@@ -0,0 +1,168 @@
+"""Polling of many devices with a cadence per endpoint."""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import random
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+import aiohttp
+
+from bwt_api.bwt import BwtModel
+from bwt_api.fleet import ApiPool, FleetHost, FleetResult
+
+
+# Endpoint names as used by the cache and scheduler -> api method
+ENDPOINT_METHODS = {
+    BwtModel.PERLA_LOCAL_API: {
+        "GetCurrentData": "get_current_data",
+        "GetDailyData": "get_daily_data",
+        "GetMonthlyData": "get_monthly_data",
+        "GetYearlyData": "get_yearly_data",
+    },
+    BwtModel.PERLA_SILK: {
+        "registers": "get_registers",
+    },
+    BwtModel.SMART_DOS: {
+        "0104": "get_wifi_info",
+        "0201": "get_device_info",
+        "0202": "get_configuration",
+        "0208": "get_time_info",
+        "0401": "get_pouch_info",
+        "0402": "get_remaining_capacity",
+        "0503": "get_treated_water",
+        "0505": "get_substance_dosage",
+    },
+}
+
+# Seconds between two calls of an endpoint, endpoints without cadence are not polled
+DEFAULT_CADENCE = {
+    "GetCurrentData": 10,
+    "GetDailyData": 30 * 60,
+    "GetMonthlyData": 24 * 60 * 60,
+    "GetYearlyData": 30 * 24 * 60 * 60,
+    "registers": 10,
+    "0201": 10,
+    "0402": 60 * 60,
+    "0503": 60,
+    "0505": 60,
+}
+
+
+class PollingCoordinator(ApiPool):
+    """Call the endpoints of many devices, each at its own cadence.
+
+    Start times are spread randomly over start_spread seconds and every following call
+    is delayed by a random jitter of up to jitter * cadence, so devices are not hit at
+    the same moment. An endpoint of a host is only called again when its previous
+    call finished and at least its cadence has passed since that call was sent, so
+    calls held back by the concurrency limits do not pile up. Results go to all
+    subscribers.
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[FleetHost],
+        cadence: Mapping[str, float] = DEFAULT_CADENCE,
+        jitter: float = 0.1,
+        start_spread: float = 60,
+        concurrency: int = 64,
+        per_host: int = 1,
+        logger: logging.Logger = logging.getLogger(__name__),
+        session: aiohttp.ClientSession | None = None,
+        api_kwargs: Callable[[FleetHost], Mapping[str, Any]] | None = None,
+    ):
+        super().__init__(concurrency, per_host, logger, session, api_kwargs)
+        self._hosts = list(hosts)
+        self._cadence = cadence
+        self._jitter = jitter
+        self._start_spread = start_spread
+        self._subscribers: list[Callable[[FleetResult], Any]] = []
+
+    def subscribe(self, callback: Callable[[FleetResult], Any]) -> Callable[[], None]:
+        """Register a callback for all results, coroutine functions are awaited.
+
+        Returns a function to unsubscribe.
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def plan(self) -> list[tuple[FleetHost, str, str]]:
+        """All (host, endpoint, method) combinations with a cadence."""
+        jobs = []
+        for host in self._hosts:
+            for endpoint, method in ENDPOINT_METHODS[host.model].items():
+                if endpoint not in self._cadence:
+                    continue
+                if host.methods is not None and method not in host.methods:
+                    continue
+                jobs.append((host, endpoint, method))
+        return jobs
+
+    async def _publish(self, result: FleetResult):
+        for callback in list(self._subscribers):
+            try:
+                ret = callback(result)
+                if inspect.isawaitable(ret):
+                    await ret
+            except Exception:
+                self._logger.exception("Subscriber failed for %s.%s", result.host, result.method)
+
+    async def _call(self, host: FleetHost, method: str, limit: asyncio.Semaphore) -> float:
+        """Call the method once the limits allow it, returns the time it was sent."""
+        async with self._host_limit(host), limit:
+            started = asyncio.get_running_loop().time()
+            try:
+                result = FleetResult(host.host, method, await getattr(self._api(host), method)())
+            except Exception as e:
+                self._logger.debug("Polling %s.%s failed: %r", host.host, method, e)
+                result = FleetResult(host.host, method, error=e)
+        await self._publish(result)
+        return started
+
+    async def run(self):
+        """Poll until cancelled."""
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(self._concurrency)
+        seq = itertools.count()
+        # Every job is either waiting in the queue or running, never both
+        queue = []
+        wakeup = asyncio.Event()
+        start = loop.time()
+        for host, endpoint, method in self.plan():
+            due = start + random.uniform(0, min(self._start_spread, self._cadence[endpoint]))
+            heapq.heappush(queue, (due, next(seq), host, endpoint, method))
+
+        def reschedule(task: asyncio.Task, host: FleetHost, endpoint: str, method: str):
+            running.discard(task)
+            if task.cancelled():
+                return
+            cadence = self._cadence[endpoint]
+            started = task.result()
+            next_due = max(started + cadence, loop.time()) + random.uniform(0, self._jitter * cadence)
+            heapq.heappush(queue, (next_due, next(seq), host, endpoint, method))
+            wakeup.set()
+
+        running: set[asyncio.Task] = set()
+        try:
+            while True:
+                wakeup.clear()
+                delay = queue[0][0] - loop.time() if queue else None
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                _, _, host, endpoint, method = heapq.heappop(queue)
+                task = asyncio.create_task(self._call(host, method, limit))
+                running.add(task)
+                task.add_done_callback(
+                    lambda task, host=host, endpoint=endpoint, method=method: reschedule(task, host, endpoint, method)
+                )
+        finally:
+            for task in running:
+                task.cancel()
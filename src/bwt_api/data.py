@@ -3,10 +3,12 @@
 
 import enum
 
-from dataclasses import dataclass
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
-from bwt_api.error import BwtError
+from typing import Any, Optional
+from bwt_api.error import BwtError, error_mask
 
 
 class BwtStatus(enum.Enum):
@@ -83,23 +85,28 @@ class CurrentResponse:
     treated_year: int  # treated water current year
     columns: int # number of columns: 2 for BWT Duo and 1 for BWT Perla One
 
+    @property
+    def error_mask(self) -> int:
+        """Bitmask of the active errors, see bwt_api.error."""
+        return error_mask(self.errors)
+
 
 @dataclass
 class DailyResponse:
     # treated water in 30 minute intervals
     # [0] = 00:00 - 00:29
     # [1] = 00:30 - 00:59
-    values: list[int]
+    values: array  # array('i')
 
 @dataclass
 class MonthlyResponse:
     # treated water in 1 day intervals
-    values: list[int]
+    values: array  # array('i')
 
 @dataclass
 class YearlyResponse:
     # treated water in 1 month intervals
-    values: list[int]
+    values: array  # array('i')
 
 
 # Smart DOS API Data Classes
@@ -192,3 +199,30 @@ class TreatedWaterResponse:
 class SubstanceDosageResponse:
     """UUID 0505: Substance Dosage"""
     dosed_mineral: float  # Substance dosage quantity since start-up (ml)
+
+
+@dataclass
+class SmartDosSnapshot:
+    """Combined result of several characteristics, missing ones are None"""
+    wifi: WifiResponse | None = None
+    device_info: DeviceInfoResponse | None = None
+    configuration: ConfigurationResponse | None = None
+    time: TimeResponse | None = None
+    pouch: PouchInfoResponse | None = None
+    remaining_capacity: Mapping[int, RemainingCapacityResponse] | None = None
+    treated_water: Mapping[int, TreatedWaterResponse] | None = None
+    substance_dosage: SubstanceDosageResponse | None = None
+    gatt_0201: dict[str, Any] | None = None  # raw 0201 characteristic
+    errors: dict[str, Exception] = field(default_factory=dict)  # UUID -> error
+
+
+# Silk API Data Classes
+
+@dataclass
+class SilkResponse:
+    """Decoded Silk registers, see bwt_api.registers"""
+    values: dict[str, int | float | None]  # register name -> scaled value, None if not available
+    units: Mapping[str, str | None]  # register name -> unit
+
+    def __getitem__(self, name: str) -> int | float | None:
+        return self.values[name]
@@ -0,0 +1,46 @@
+"""JSON decoding of the raw response bodies.
+
+The fastest installed library is used: orjson, then msgspec, then the standard json
+module. All decoders take the body bytes and raise ValueError for invalid JSON.
+"""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+JsonDecoder = Callable[[bytes], Any]
+
+
+def stdlib_decoder() -> JsonDecoder:
+    return json.loads
+
+
+def orjson_decoder() -> JsonDecoder:
+    import orjson
+    return orjson.loads
+
+
+def msgspec_decoder() -> JsonDecoder:
+    import msgspec
+    decode = msgspec.json.Decoder().decode
+
+    def loads(body: bytes) -> Any:
+        try:
+            return decode(body)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return loads
+
+
+def default_decoder() -> JsonDecoder:
+    """The fastest available decoder."""
+    for factory in (orjson_decoder, msgspec_decoder):
+        try:
+            return factory()
+        except ImportError:
+            pass
+    return stdlib_decoder()
+
+
+DEFAULT_DECODER = default_decoder()
@@ -2,6 +2,8 @@
 
 
 import enum
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 
 
 class BwtError(enum.Enum):
@@ -71,7 +73,7 @@ class BwtError(enum.Enum):
         return hash(self._value_)
 
     def is_fatal(self) -> bool:
-        return self not in WARNING_CODES
+        return self not in _WARNING_SET
 
 
 WARNING_CODES = [
@@ -96,3 +98,50 @@ WARNING_CODES = [
     BwtError.BRINE_UNSATURATED,
     BwtError.DOSING_FAULT,
 ]
+
+_WARNING_SET = frozenset(WARNING_CODES)
+
+
+# Error sets as int bitmasks: bit value + 1 is set for an active error, so UNKNOWN
+# (-1) is bit 0. Comparing and aggregating masks needs no Python list work.
+
+def error_mask(errors: Iterable[BwtError]) -> int:
+    """Bitmask of the errors."""
+    mask = 0
+    for error in errors:
+        if error.value < -1:
+            raise ValueError(f"Error id {error.value} has no bit")
+        mask |= 1 << (error.value + 1)
+    return mask
+
+
+def mask_errors(mask: int) -> list[BwtError]:
+    """Errors of a bitmask, sorted by id."""
+    errors = []
+    while mask:
+        low = mask & -mask
+        errors.append(BwtError(low.bit_length() - 2))
+        mask ^= low
+    return errors
+
+
+WARNING_MASK = error_mask(WARNING_CODES)
+
+
+def any_fatal(mask: int) -> bool:
+    """Whether any error of the bitmask is fatal."""
+    return bool(mask & ~WARNING_MASK)
+
+
+@dataclass(frozen=True)
+class ErrorEvent:
+    error: BwtError
+    raised: bool  # True: became active, False: cleared
+
+
+def diff_errors(previous: int, current: int) -> Iterator[ErrorEvent]:
+    """Events for the errors raised and cleared between two bitmasks."""
+    for error in mask_errors(current & ~previous):
+        yield ErrorEvent(error, True)
+    for error in mask_errors(previous & ~current):
+        yield ErrorEvent(error, False)
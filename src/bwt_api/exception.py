@@ -15,3 +15,21 @@ class ApiException(BwtException):
 
 class ConnectException(BwtException):
     """Connection issue."""
+
+
+class DeadlineExceededException(ConnectException):
+    """A latency budget of the request was exceeded."""
+
+    def __init__(self, phase: str, budget: float | None, elapsed: float):
+        super().__init__(f"{phase} budget of {budget}s exceeded after {elapsed:.3f}s")
+        self.phase = phase  # connect, read or total
+        self.budget = budget  # seconds
+        self.elapsed = elapsed  # seconds since the request was sent
+
+
+class CircuitOpenException(ConnectException):
+    """The host failed repeatedly, requests are not sent until the cooldown is over."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit open, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after  # seconds
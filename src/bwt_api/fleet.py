@@ -0,0 +1,214 @@
+"""Concurrent polling of many BWT devices."""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+import aiohttp
+
+from bwt_api.bwt import BwtModel
+from bwt_api.bwt_api import BwtApi
+from bwt_api.error import WARNING_MASK, BwtError, ErrorEvent, diff_errors
+from bwt_api.session import create_connector
+from bwt_api.silk_api import BwtSilkApi
+from bwt_api.smart_dos_api import BwtSmartDosApi
+
+
+# Calls made for each model if the host does not list its own
+DEFAULT_METHODS = {
+    BwtModel.PERLA_LOCAL_API: ("get_current_data",),
+    BwtModel.PERLA_SILK: ("get_registers",),
+    BwtModel.SMART_DOS: ("get_device_info",),
+}
+
+
+@dataclass
+class FleetHost:
+    host: str
+    model: BwtModel
+    code: str | None = None  # login code, only needed for the Perla local API
+    methods: tuple[str, ...] | None = None  # get_* methods, None for the model defaults
+
+
+@dataclass
+class FleetResult:
+    host: str
+    method: str
+    value: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def create_api(host: FleetHost, logger: logging.Logger, session: aiohttp.ClientSession | None = None, **kwargs):
+    """Create the api object matching the model of the host.
+
+    kwargs are passed to the api class, e.g. cache, retry or circuit_breaker.
+    """
+    if host.model == BwtModel.PERLA_LOCAL_API:
+        if host.code is None:
+            raise ValueError(f"Host {host.host} needs a login code")
+        return BwtApi(host.host, host.code, logger=logger, session=session, **kwargs)
+    if host.model == BwtModel.PERLA_SILK:
+        return BwtSilkApi(host.host, logger=logger, session=session, **kwargs)
+    if host.model == BwtModel.SMART_DOS:
+        return BwtSmartDosApi(host.host, logger=logger, session=session, **kwargs)
+    raise ValueError(f"Unknown model {host.model}")
+
+
+class ApiPool:
+    """Api objects of many hosts sharing one session, with a limit per host.
+
+    Without a passed session one is created with bwt_api.session.create_connector on
+    first use and closed in close(). api_kwargs(host) returns further keyword arguments
+    for the api object of a host, e.g. a shared cache and a circuit breaker per host.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 64,
+        per_host: int = 1,
+        logger: logging.Logger = logging.getLogger(__name__),
+        session: aiohttp.ClientSession | None = None,
+        api_kwargs: Callable[[FleetHost], Mapping[str, Any]] | None = None,
+    ):
+        self._session = session
+        self._api_kwargs = api_kwargs
+        self._owns_session = session is None
+        self._concurrency = concurrency
+        self._per_host = per_host
+        self._logger = logger
+        self._apis: dict[str, Any] = {}
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *err):
+        await self.close()
+
+    async def close(self):
+        apis = list(self._apis.values())
+        self._apis.clear()
+        for api in apis:
+            await api.close()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _api(self, host: FleetHost):
+        api = self._apis.get(host.host)
+        if api is None:
+            if self._session is None:
+                self._session = aiohttp.ClientSession(
+                    connector=create_connector(limit=self._concurrency, limit_per_host=self._per_host)
+                )
+            kwargs = self._api_kwargs(host) if self._api_kwargs is not None else {}
+            api = create_api(host, self._logger, self._session, **kwargs)
+            self._apis[host.host] = api
+        return api
+
+    def _host_limit(self, host: FleetHost) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host.host)
+        if limit is None:
+            limit = self._host_limits[host.host] = asyncio.Semaphore(self._per_host)
+        return limit
+
+
+class FleetPoller(ApiPool):
+    """Poll many devices with a global and a per host concurrency limit.
+
+    All api objects share one session. Without a passed session the poller creates one
+    with bwt_api.session.create_connector and closes it in close(). See ApiPool for
+    api_kwargs.
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[FleetHost],
+        concurrency: int = 64,
+        per_host: int = 1,
+        logger: logging.Logger = logging.getLogger(__name__),
+        session: aiohttp.ClientSession | None = None,
+        api_kwargs: Callable[[FleetHost], Mapping[str, Any]] | None = None,
+    ):
+        super().__init__(concurrency, per_host, logger, session, api_kwargs)
+        self._hosts = list(hosts)
+
+    async def _call(self, host: FleetHost, method: str, limit: asyncio.Semaphore) -> FleetResult:
+        # The host limit first, so calls queued for a busy host do not hold global slots
+        async with self._host_limit(host), limit:
+            try:
+                value = await getattr(self._api(host), method)()
+            except Exception as e:
+                self._logger.debug("Polling %s.%s failed: %r", host.host, method, e)
+                return FleetResult(host.host, method, error=e)
+            return FleetResult(host.host, method, value)
+
+    async def poll(self) -> AsyncIterator[FleetResult]:
+        """Poll all hosts once and yield the results in order of completion."""
+        limit = asyncio.Semaphore(self._concurrency)
+        tasks = [
+            asyncio.create_task(self._call(host, method, limit))
+            for host in self._hosts
+            for method in (host.methods or DEFAULT_METHODS[host.model])
+        ]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class FleetErrors:
+    """Active errors of many devices, kept as one bitmask of devices per error.
+
+    Counting the devices with an error is a bit count of its device mask.
+    """
+
+    def __init__(self):
+        self._index: dict[str, int] = {}  # host -> device bit
+        self._hosts: list[str] = []
+        self._masks: dict[str, int] = {}  # host -> error mask
+        self._devices: dict[int, int] = {}  # error bit -> device mask
+
+    def update(self, host: str, mask: int) -> list[ErrorEvent]:
+        """Set the error mask of a host, returns the raised and cleared errors."""
+        index = self._index.get(host)
+        if index is None:
+            index = self._index[host] = len(self._hosts)
+            self._hosts.append(host)
+        previous = self._masks.get(host, 0)
+        changed = previous ^ mask
+        device = 1 << index
+        while changed:
+            low = changed & -changed
+            bit = low.bit_length() - 1
+            self._devices[bit] = self._devices.get(bit, 0) ^ device
+            changed ^= low
+        self._masks[host] = mask
+        return list(diff_errors(previous, mask))
+
+    def devices(self, error: BwtError) -> int:
+        """Bitmask of the devices with the error."""
+        return self._devices.get(error.value + 1, 0)
+
+    def count(self, error: BwtError) -> int:
+        return self.devices(error).bit_count()
+
+    def hosts(self, error: BwtError) -> list[str]:
+        devices = self.devices(error)
+        return [host for index, host in enumerate(self._hosts) if devices >> index & 1]
+
+    def fatal_count(self) -> int:
+        """Number of devices with at least one fatal error."""
+        devices = 0
+        for bit, mask in self._devices.items():
+            if not WARNING_MASK >> bit & 1:
+                devices |= mask
+        return devices.bit_count()
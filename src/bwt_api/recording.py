@@ -0,0 +1,201 @@
+"""Record raw device responses and replay them offline.
+
+RecordingSession wraps an aiohttp session and appends every response to a file.
+ReplaySession serves the responses of such a file again. Both are passed to the api
+classes as session:
+
+    async with aiohttp.ClientSession() as session:
+        api = BwtApi(host, code, session=RecordingSession(session, "fleet.rec"))
+
+    api = BwtApi(host, code, session=ReplaySession("fleet.rec", speed=100))
+"""
+
+import asyncio
+import json
+import struct
+import time
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from bwt_api.exception import ConnectException
+
+
+_MAGIC = b"BWTREC1\n"
+# timestamp, latency in seconds, status, length of the meta data, length of the body
+_HEADER = struct.Struct("<dfHII")
+
+
+@dataclass
+class Record:
+    timestamp: float  # unix timestamp when the request was sent
+    url: str
+    status: int
+    headers: list[tuple[str, str]]  # in received order, a name can occur more than once
+    body: bytes
+    latency: float  # seconds until the body was read
+
+
+def read_records(path: str) -> Iterator[Record]:
+    """Read all complete records of a file, a partly written last record is skipped."""
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            timestamp, latency, status, meta_len, body_len = _HEADER.unpack(header)
+            meta = f.read(meta_len)
+            body = f.read(body_len)
+            if len(meta) < meta_len or len(body) < body_len:
+                return
+            meta = json.loads(meta)
+            headers = [tuple(pair) for pair in meta["headers"]]
+            yield Record(timestamp, meta["url"], status, headers, body, latency)
+
+
+class RecordedResponse:
+    """The parts of aiohttp.ClientResponse used by the api classes, served from memory."""
+
+    def __init__(self, status: int, headers: Mapping[str, str] | Iterable[tuple[str, str]], body: bytes):
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *err):
+        pass
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode("utf-8")
+
+    async def json(self, content_type: str | None = None) -> Any:
+        return json.loads(self._body)
+
+
+class _RecordingRequest:
+    def __init__(self, recorder: "RecordingSession", url: str, kwargs: dict[str, Any]):
+        self._recorder = recorder
+        self._url = url
+        self._kwargs = kwargs
+
+    async def __aenter__(self) -> RecordedResponse:
+        timestamp = time.time()
+        start = time.monotonic()
+        async with self._recorder.session.get(self._url, **self._kwargs) as response:
+            body = await response.read()
+            headers = list(response.headers.items())
+            status = response.status
+        self._recorder.record(Record(timestamp, self._url, status, headers, body, time.monotonic() - start))
+        return RecordedResponse(status, headers, body)
+
+    async def __aexit__(self, *err):
+        pass
+
+
+class RecordingSession:
+    """Session wrapper appending every response to a recording file.
+
+    Records are written by a background task in a worker thread, records arriving
+    meanwhile are batched into one write. close() waits until all are written.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, path: str):
+        self.session = session
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+            self._file.flush()
+        self._pending: list[bytes] = []
+        self._writing: asyncio.Task | None = None
+
+    def get(self, url: str, **kwargs) -> _RecordingRequest:
+        return _RecordingRequest(self, url, kwargs)
+
+    def record(self, record: Record):
+        meta = json.dumps({"url": record.url, "headers": record.headers}, separators=(",", ":")).encode()
+        header = _HEADER.pack(record.timestamp, record.latency, record.status, len(meta), len(record.body))
+        self._pending.append(header + meta + record.body)
+        if self._writing is None:
+            self._writing = asyncio.get_running_loop().create_task(self._write_pending())
+
+    async def _write_pending(self):
+        try:
+            while self._pending:
+                data = b"".join(self._pending)
+                self._pending.clear()
+                await asyncio.to_thread(self._write, data)
+        finally:
+            self._writing = None
+
+    def _write(self, data: bytes):
+        # Whole records per write, so a crash leaves at most one partial record at the end
+        self._file.write(data)
+        self._file.flush()
+
+    async def close(self):
+        """Write the pending records and close the file, the wrapped session stays open."""
+        if self._writing is not None:
+            await asyncio.shield(self._writing)
+        self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+
+class ReplaySession:
+    """Serve the responses of a recording again, per URL in recorded order.
+
+    With speed None responses come back at once, otherwise after the recorded latency
+    divided by speed. With loop the responses of a URL start over when all were
+    served, else a ConnectException is raised like for an unreachable device.
+    """
+
+    def __init__(self, path: str, speed: float | None = None, loop: bool = True):
+        self._speed = speed
+        self._loop = loop
+        self._responses: dict[str, deque[Record]] = defaultdict(deque)
+        for record in read_records(path):
+            self._responses[record.url].append(record)
+        self.closed = False
+
+    def get(self, url: str, **kwargs) -> "_ReplayRequest":
+        return _ReplayRequest(self, url)
+
+    async def serve(self, url: str) -> RecordedResponse:
+        responses = self._responses.get(url)
+        if not responses:
+            raise ConnectException(f"No recorded response for {url}")
+        record = responses.popleft()
+        if self._loop:
+            responses.append(record)
+        if self._speed is not None:
+            await asyncio.sleep(record.latency / self._speed)
+        return RecordedResponse(record.status, record.headers, record.body)
+
+    async def close(self):
+        self.closed = True
+
+
+class _ReplayRequest:
+    def __init__(self, replay: ReplaySession, url: str):
+        self._replay = replay
+        self._url = url
+
+    async def __aenter__(self) -> RecordedResponse:
+        return await self._replay.serve(self._url)
+
+    async def __aexit__(self, *err):
+        pass
+
@@ -0,0 +1,104 @@
+"""Decoding of the raw Silk register vectors.
+
+The meaning of the registers is not documented, so the default map only names them
+by index. Pass a map with the registers known for a device to get named, scaled
+values:
+
+    decoder = SilkDecoder({2: Register("hardness_in", unit="dH"), 4: Register("capacity", 10, "l")})
+    response = decoder.decode(await api.get_registers())
+    response["hardness_in"]
+"""
+
+import math
+from array import array
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from bwt_api.data import SilkResponse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass(frozen=True)
+class Register:
+    name: str
+    scale: float = 1  # value = raw * scale, 1 keeps integers
+    unit: str | None = None
+    sentinel: int | None = -1  # raw value meaning not available, None if every value is valid
+
+
+# Number of registers of the known devices
+REGISTER_COUNT = 48
+
+# Nothing is known about the registers, so no value is taken as not available
+DEFAULT_REGISTER_MAP = {index: Register(f"register_{index:02}", sentinel=None) for index in range(REGISTER_COUNT)}
+
+
+class SilkDecoder:
+    """Decode register vectors with a map of index -> Register, prepared once."""
+
+    def __init__(self, register_map: Mapping[int, Register] = DEFAULT_REGISTER_MAP):
+        entries = sorted(register_map.items())
+        if len({register.name for _, register in entries}) != len(entries):
+            raise ValueError("Register names must be unique")
+        self._indices = tuple(index for index, _ in entries)
+        self._names = tuple(register.name for _, register in entries)
+        self._scales = tuple(register.scale for _, register in entries)
+        self._sentinels = tuple(register.sentinel for _, register in entries)
+        # Shared by all responses, so read-only
+        self._units = MappingProxyType({register.name: register.unit for _, register in entries})
+        self._size = self._indices[-1] + 1 if entries else 0
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return self._names
+
+    def decode(self, registers: Sequence[int]) -> SilkResponse:
+        """Decode one vector, registers missing in a short vector are None."""
+        count = len(registers)
+        values = {}
+        for index, name, scale, sentinel in zip(self._indices, self._names, self._scales, self._sentinels):
+            raw = registers[index] if index < count else None
+            if raw is None or raw == sentinel:
+                values[name] = None
+            else:
+                values[name] = raw if scale == 1 else raw * scale
+        return SilkResponse(values, self._units)
+
+    def decode_batch(self, vectors: Iterable[Sequence[int]]) -> dict[str, array]:
+        """Decode many vectors into one array('d') per register, NaN if not available.
+
+        All vectors must have the same length and cover the mapped registers.
+        """
+        vectors = list(vectors)
+        if not vectors:
+            return {name: array("d") for name in self._names}
+        width = len(vectors[0])
+        if width < self._size or any(len(vector) != width for vector in vectors):
+            raise ValueError(f"All vectors need the same length of at least {self._size} registers")
+
+        if np is not None:
+            raw = np.array(vectors, dtype=np.int64)[:, list(self._indices)]
+            scaled = raw * np.array(self._scales, dtype=float)
+            sentinels = np.array([np.iinfo(np.int64).min if s is None else s for s in self._sentinels])
+            scaled[raw == sentinels] = np.nan
+            return {name: array("d", np.ascontiguousarray(scaled[:, column]).tobytes())
+                    for column, name in enumerate(self._names)}
+
+        # Transpose once in C, then convert column by column
+        columns = list(zip(*vectors))
+        result = {}
+        for index, name, scale, sentinel in zip(self._indices, self._names, self._scales, self._sentinels):
+            column = columns[index]
+            if sentinel is not None and sentinel in column:
+                result[name] = array("d", (math.nan if raw == sentinel else raw * scale for raw in column))
+            else:
+                result[name] = array("d", map(float(scale).__mul__, column))
+        return result
+
+
+DEFAULT_SILK_DECODER = SilkDecoder()
@@ -0,0 +1,116 @@
+"""Retry policies and circuit breaking for unreachable devices."""
+
+import asyncio
+import enum
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from bwt_api.exception import CircuitOpenException, ConnectException
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry failed requests with exponential backoff and jitter."""
+    exceptions: tuple[type[Exception], ...] = (ConnectException,)  # errors worth a retry
+    max_attempts: int = 3  # including the first attempt
+    base_delay: float = 0.5  # seconds before the second attempt
+    max_delay: float = 10  # upper bound of the delay in seconds
+    jitter: float = 1.0  # 0: fixed delays, 1: uniformly random between 0 and the delay
+
+    def delay(self, attempt: int) -> float:
+        """Delay in seconds after the failed attempt, starting at 1."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay - self.jitter * random.uniform(0, delay)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitState(enum.Enum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class CircuitBreaker:
+    """Fail fast for a host after repeated connection failures.
+
+    After failure_threshold failures in a row the circuit opens and requests fail with
+    CircuitOpenException for cooldown seconds. Then a single trial request is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 30,
+        exceptions: tuple[type[Exception], ...] = (ConnectException,),
+    ):
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._exceptions = exceptions
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.state = CircuitState.CLOSED
+
+    def before_request(self):
+        """Raise CircuitOpenException if the request must not be sent."""
+        if self.state == CircuitState.CLOSED:
+            return
+        retry_after = self._opened_at + self._cooldown - time.monotonic()
+        if self.state == CircuitState.OPEN and retry_after <= 0:
+            self.state = CircuitState.HALF_OPEN
+        if self.state == CircuitState.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return
+        raise CircuitOpenException(max(retry_after, 0))
+
+    def abort(self):
+        """The request let through by before_request was cancelled without an outcome."""
+        self._trial_running = False
+
+    def record(self, error: BaseException | None):
+        """Record the outcome of a request let through by before_request."""
+        self._trial_running = False
+        if error is None or not isinstance(error, self._exceptions):
+            # The device answered, even errors like a wrong code mean it is reachable
+            self._failures = 0
+            self.state = CircuitState.CLOSED
+            return
+        self._failures += 1
+        if self.state == CircuitState.HALF_OPEN or self._failures >= self._failure_threshold:
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+
+async def call_with_retry(
+    load: Callable[[], Awaitable[Any]],
+    policy: RetryPolicy = NO_RETRY,
+    breaker: CircuitBreaker | None = None,
+) -> Any:
+    """Await load() according to the retry policy and circuit breaker."""
+    attempt = 1
+    while True:
+        if breaker is not None:
+            breaker.before_request()
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.abort()
+            raise
+        except Exception as e:
+            if breaker is not None:
+                breaker.record(e)
+            if attempt >= policy.max_attempts or not isinstance(e, policy.exceptions):
+                raise
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+            continue
+        if breaker is not None:
+            breaker.record(None)
+        return result
@@ -0,0 +1,117 @@
+"""Per device request scheduling with priorities and rate limiting."""
+
+import asyncio
+import enum
+import heapq
+import itertools
+import time
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+# Live data jumps ahead of history backfills
+DEFAULT_PRIORITIES = {
+    "GetCurrentData": Priority.INTERACTIVE,
+    "GetDailyData": Priority.NORMAL,
+    "GetMonthlyData": Priority.BACKGROUND,
+    "GetYearlyData": Priority.BACKGROUND,
+}
+
+
+class HostScheduler:
+    """Limit the requests sent to one device.
+
+    At most max_in_flight requests run at the same time. With a rate, a token bucket
+    allows rate requests per second with bursts of up to burst requests. Waiting
+    requests are started by priority of their endpoint, then in arrival order.
+    Share one scheduler between all api objects of the same host.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 1,
+        rate: float | None = None,
+        burst: int = 1,
+        priorities: Mapping[str, Priority] = DEFAULT_PRIORITIES,
+        default_priority: Priority = Priority.NORMAL,
+    ):
+        self._max_in_flight = max_in_flight
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._priorities = priorities
+        self._default_priority = default_priority
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def priority(self, endpoint: str) -> Priority:
+        return self._priorities.get(endpoint, self._default_priority)
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str, priority: Priority | None = None):
+        """Wait for a free slot for a request to the endpoint."""
+        await self._acquire(self.priority(endpoint) if priority is None else priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority):
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted right before the cancellation, hand it on
+                self._release()
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._waiters and self._in_flight < self._max_in_flight:
+            waiter = self._waiters[0][2]
+            if waiter.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._rate is not None:
+                self._refill()
+                if self._tokens < 1:
+                    if self._wakeup is None:
+                        delay = (1 - self._tokens) / self._rate
+                        self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+                    return
+                self._tokens -= 1
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            waiter.set_result(None)
@@ -0,0 +1,150 @@
+"""Helpers for the daily, monthly and yearly water series.
+
+The values of DailyResponse, MonthlyResponse and YearlyResponse are array('i'). With
+numpy installed, as_numpy() returns views sharing their memory:
+
+    daily = await api.get_daily_data()
+    as_numpy(daily.values).sum()
+"""
+
+from array import array
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time, tzinfo
+from itertools import accumulate
+from operator import add
+
+from bwt_api.data import Hardness
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# C int, 4 bytes on all supported platforms
+TYPECODE = "i"
+SLOTS_PER_DAY = 48
+
+
+def as_numpy(values: array):
+    """Numpy view of an array without copying, changes are visible in both."""
+    if np is None:
+        raise ImportError("as_numpy needs numpy")
+    return np.frombuffer(values, dtype=values.typecode)
+
+
+def cumulative(values: Sequence[int]) -> array:
+    """Running totals, as 8 byte integers so year long sums cannot overflow."""
+    return array("q", accumulate(values))
+
+
+def hourly(values: Sequence[int]) -> array:
+    """Sum the 48 half-hour slots of a day into 24 hours."""
+    if len(values) != SLOTS_PER_DAY:
+        raise ValueError(f"Expected {SLOTS_PER_DAY} half-hour slots, got {len(values)}")
+    return array(TYPECODE, map(add, values[0::2], values[1::2]))
+
+
+def daily_timestamps(day: date, tz: tzinfo | None = None) -> array:
+    """Unix timestamps of the starts of the 48 half-hour slots of a day.
+
+    The device counts the slots in wall-clock time, so each start is built from its
+    wall time in tz (local time if None). On a day the clocks go forward the slots
+    that do not exist start at the change, so they have no length. On a day the
+    clocks go back the repeated hour counts once, its last slot lasts 90 minutes.
+    """
+    stamps = array("q", (
+        int(datetime.combine(day, time(slot // 2, slot % 2 * 30), tzinfo=tz).timestamp())
+        for slot in range(SLOTS_PER_DAY)
+    ))
+    # A skipped wall time maps past the change, move it to the next existing slot
+    for slot in range(SLOTS_PER_DAY - 2, -1, -1):
+        stamps[slot] = min(stamps[slot], stamps[slot + 1])
+    return stamps
+
+
+class SeriesMatrix:
+    """Series of many devices as one row-major matrix, one row per device."""
+
+    def __init__(self, values: array, rows: int, columns: int):
+        if len(values) != rows * columns:
+            raise ValueError(f"{len(values)} values do not fit {rows}x{columns}")
+        self.values = values
+        self.rows = rows
+        self.columns = columns
+
+    @classmethod
+    def stack(cls, series: Iterable[Sequence[int]]) -> "SeriesMatrix":
+        """Stack series of the same length, e.g. the daily values of a fleet."""
+        values = array(TYPECODE)
+        rows = 0
+        columns = None
+        for row in series:
+            if columns is None:
+                columns = len(row)
+            elif len(row) != columns:
+                raise ValueError(f"Series {rows} has {len(row)} values, expected {columns}")
+            if isinstance(row, array) and row.typecode != TYPECODE:
+                row = row.tolist()
+            values.extend(row)
+            rows += 1
+        return cls(values, rows, columns or 0)
+
+    def row(self, index: int) -> memoryview:
+        """Values of one device without copying."""
+        if not 0 <= index < self.rows:
+            raise IndexError(index)
+        start = index * self.columns
+        return memoryview(self.values)[start:start + self.columns]
+
+    def column_sums(self) -> array:
+        """Fleet-wide total per slot."""
+        if np is not None:
+            return array("q", self.to_numpy().sum(axis=0, dtype=np.int64).tobytes())
+        sums = [0] * self.columns
+        values = self.values
+        for column in range(self.columns):
+            sums[column] = sum(values[column::self.columns])
+        return array("q", sums)
+
+    def to_numpy(self):
+        """Numpy view of shape (rows, columns) without copying."""
+        return as_numpy(self.values).reshape(self.rows, self.columns)
+
+
+def treated_to_blended_batch(
+    treated: SeriesMatrix | Iterable[Sequence[int]],
+    hardness_in: Hardness | Sequence[Hardness],
+    hardness_out: Hardness | Sequence[Hardness],
+    unit: str = "dH",
+) -> SeriesMatrix:
+    """Blended water of many devices, like treated_to_blended for every value.
+
+    Each row of treated is the series of one device. The hardness is one for all
+    devices or one per row, unit is the Hardness field to use: dH, fH, caco3 or
+    mmol. Returns float values in a matrix of the same shape.
+    """
+    if not isinstance(treated, SeriesMatrix):
+        treated = SeriesMatrix.stack(treated)
+    if isinstance(hardness_in, Hardness):
+        hardness_in = [hardness_in] * treated.rows
+    if isinstance(hardness_out, Hardness):
+        hardness_out = [hardness_out] * treated.rows
+    if not len(hardness_in) == len(hardness_out) == treated.rows:
+        raise ValueError(f"Expected hardness for {treated.rows} devices")
+    hin = [getattr(hardness, unit) for hardness in hardness_in]
+    hout = [getattr(hardness, unit) for hardness in hardness_out]
+
+    if np is not None:
+        hin = np.array(hin, dtype=float)
+        hout = np.array(hout, dtype=float)
+        # treated / (1 - out / in) == treated * in / (in - out), factor 1 without softening
+        unchanged = (hin == 0) | (hin == hout)
+        factor = np.where(unchanged, 1.0, hin / np.where(unchanged, 1.0, hin - hout))
+        blended = treated.to_numpy() * factor[:, np.newaxis]
+        return SeriesMatrix(array("d", blended.tobytes()), treated.rows, treated.columns)
+
+    values = array("d")
+    for index, (i, o) in enumerate(zip(hin, hout)):
+        factor = 1.0 if i == 0 or i == o else i / (i - o)
+        values.extend(map(factor.__mul__, treated.row(index)))
+    return SeriesMatrix(values, treated.rows, treated.columns)
@@ -0,0 +1,51 @@
+"""Shared aiohttp connection pool for the api classes."""
+
+import asyncio
+import weakref
+
+import aiohttp
+
+
+_shared_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def create_connector(
+    limit: int = 100,
+    limit_per_host: int = 2,
+    keepalive_timeout: float = 30.0,
+    ttl_dns_cache: int | None = 300,
+) -> aiohttp.TCPConnector:
+    """Create a connector tuned for polling many small devices.
+
+    The device web servers only handle a few connections, so the per host limit is low
+    while the total limit allows many devices in parallel.
+    """
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+
+
+def shared_session(**connector_args) -> aiohttp.ClientSession:
+    """Get the library managed session of the running event loop.
+
+    The session is created on first use with a connector from create_connector.
+    The arguments are only used when the session is created.
+    """
+    loop = asyncio.get_running_loop()
+    session = _shared_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(connector=create_connector(**connector_args))
+        _shared_sessions[loop] = session
+    return session
+
+
+async def close_shared_session():
+    """Close the shared session of the running event loop, if any."""
+    session = _shared_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
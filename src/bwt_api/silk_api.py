@@ -1,19 +1,65 @@
 """The BWT Silk API class."""
 
 import aiohttp
+import asyncio
 import logging
+import time
+from typing import Any
+from collections.abc import AsyncIterator, Awaitable, Callable
 
+from bwt_api.cache import ResponseCache
+from bwt_api.coalesce import RequestCoalescer
+from bwt_api.data import SilkResponse
+from bwt_api.decode import DEFAULT_DECODER, JsonDecoder
 from bwt_api.exception import ApiException, ConnectException
+from bwt_api.registers import DEFAULT_SILK_DECODER, SilkDecoder
+from bwt_api.retry import NO_RETRY, CircuitBreaker, RetryPolicy, call_with_retry
+from bwt_api.scheduler import HostScheduler
+from bwt_api.timeout import DEFAULT_TIMEOUTS, Timeouts, current_timeouts
+from bwt_api.watch import AdaptiveInterval, poll
 
 
 class BwtSilkApi:
     """BWT Silk Api."""
     _session: aiohttp.ClientSession
+    _owns_session: bool
     _host: str
 
-    def __init__(self, host, logger: logging.Logger = logging.getLogger(__name__)):
+    def __init__(
+        self,
+        host,
+        logger: logging.Logger = logging.getLogger(__name__),
+        session: aiohttp.ClientSession | None = None,
+        connector: aiohttp.BaseConnector | None = None,
+        cache: ResponseCache | None = None,
+        coalescer: RequestCoalescer | None = None,
+        scheduler: HostScheduler | None = None,
+        timeouts: Timeouts = DEFAULT_TIMEOUTS,
+        retry: RetryPolicy = NO_RETRY,
+        circuit_breaker: CircuitBreaker | None = None,
+        decoder: JsonDecoder = DEFAULT_DECODER,
+    ):
+        """Create the api. A passed session is shared and not closed by close().
+
+        With a cache, the registers are reused according to the ttl of "registers".
+        Concurrent calls share one request, also across api objects with a shared coalescer.
+        A scheduler limits and prioritizes the requests sent to the device.
+        The timeouts can be overridden per call with bwt_api.timeout.deadline().
+        Failed requests are retried according to retry, a circuit breaker lets requests
+        to an unreachable host fail fast. The decoder parses the raw response bodies.
+        """
         self._host = host
-        self._session = aiohttp.ClientSession()
+        self._owns_session = session is None
+        if session is None:
+            session = aiohttp.ClientSession(connector=connector, connector_owner=connector is None)
+        self._session = session
+        self._cache = cache
+        self._coalescer = coalescer if coalescer is not None else RequestCoalescer()
+        self._scheduler = scheduler
+        self._timeouts = timeouts
+        self._retry = retry
+        self._circuit_breaker = circuit_breaker
+        self._decoder = decoder
         self._logger = logger
 
     async def __aenter__(self):
@@ -23,24 +69,84 @@ class BwtSilkApi:
         await self.close()
 
     async def close(self):
-        await self._session.close()
+        if self._owns_session:
+            await self._session.close()
 
     async def get_registers(self) -> list[int]:
+        """Fetch the raw register values, using the cache if configured."""
+        if self._cache is not None:
+            json = await self._cache.get_or_load(self._host, "registers", self._load_registers)
+        else:
+            json = await self._load_registers()
+        return json["params"]
+
+    async def get_decoded_registers(self, decoder: SilkDecoder = DEFAULT_SILK_DECODER) -> SilkResponse:
+        """Fetch the registers and decode them with the register map of the decoder.
+
+        The default map only names the 48 registers by index and keeps every raw
+        value, -1 included. Pass a decoder with the registers known for the device
+        to get meaningful names, scales and not available values.
+        """
+        return decoder.decode(await self.get_registers())
+
+    def watch(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        backoff: float = 2.0,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> AsyncIterator[list[int]]:
+        """Poll the registers with an adaptive interval.
+
+        The interval drops to min_interval while the registers change and grows by
+        backoff up to max_interval while they stay the same. Connection and api errors
+        are logged and retried with the idle backoff, see watch.poll. sleep waits
+        between the polls.
+        """
+        return poll(
+            self.get_registers,
+            lambda registers, previous: previous is not None and registers != previous,
+            AdaptiveInterval(min_interval, max_interval, backoff),
+            self._logger,
+            sleep,
+        )
+
+    async def _load_registers(self) -> dict:
+        """Internal method to join an in-flight request for the registers or start one."""
+        return await self._coalescer.run(
+            (self._host, "registers"),
+            lambda: call_with_retry(self._fetch_registers, self._retry, self._circuit_breaker),
+        )
+
+    async def _fetch_registers(self) -> dict:
+        """Internal method to send the request once the scheduler allows it."""
+        if self._scheduler is None:
+            return await self._request_registers()
+        async with self._scheduler.slot("registers"):
+            return await self._request_registers()
+
+    async def _request_registers(self) -> dict:
         """Internal method to fetch json from the endpoint and handle general errors."""
+        timeouts = current_timeouts(self._timeouts)
+        start = time.monotonic()
         try:
-            async with self._session.get(f"http://{self._host}:80/silk/registers") as response:
+            async with self._session.get(f"http://{self._host}:80/silk/registers", timeout=timeouts.client_timeout()) as response:
                 self._logger.debug(
                     "Response status: %s, content-type: %s",
                     response.status,
                     response.headers['content-type']
                 )
                 if response.status == 200:
-                    json = await response.json(content_type=None)
+                    json = self._decoder(await response.read())
                     self._logger.debug("Raw response: %s", json)
-                    return json["params"]
+                    return json
                 else:
                     text = await response.text()
                     self._logger.warning("Unknown response with status %s: %s", response.status, text)
                     raise ApiException(f"Unknown response: {text}")
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            raise timeouts.exceeded(e, time.monotonic() - start) from e
         except aiohttp.ClientConnectorError as e:
             raise ConnectException from e
+        except ValueError as e:
+            raise ApiException from e
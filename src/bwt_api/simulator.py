@@ -0,0 +1,232 @@
+"""Local simulator of BWT devices for load tests.
+
+One aiohttp server emulates any number of devices as virtual hosts. Api objects reach
+it through the connector of the simulator, which resolves the device host names to
+the server and routes ports 8080 and 80 to it:
+
+    async with DeviceSimulator() as sim:
+        sim.add("perla-1.sim", SimulatedDevice(BwtModel.PERLA_LOCAL_API, code="1234"))
+        async with sim.session() as session:
+            async with BwtApi("perla-1.sim", "1234", session=session) as api:
+                await api.get_current_data()
+"""
+
+import asyncio
+import base64
+import copy
+import json
+import random
+import socket
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+from bwt_api.bwt import BwtModel
+
+
+CURRENT_DATA = {
+    "ActiveErrorIDs": "5,32",
+    "BlendedWaterSinceSetup_l": 318383,
+    "CapacityColumn1_ml_dH": 5485275,
+    "CapacityColumn2_ml_dH": 3833994,
+    "CurrentFlowrate_l_h": 0,
+    "DosingSinceSetup_ml": 0,
+    "FirmwareVersion": "2.0207",
+    "HardnessIN_CaCO3": 374,
+    "HardnessIN_dH": 21,
+    "HardnessIN_fH": 37,
+    "HardnessIN_mmol_l": 4,
+    "HardnessOUT_CaCO3": 71,
+    "HardnessOUT_dH": 4,
+    "HardnessOUT_fH": 7,
+    "HardnessOUT_mmol_l": 1,
+    "HolidayModeStartTime": 0,
+    "LastRegenerationColumn1": "2023-11-16 04:42:15",
+    "LastRegenerationColumn2": "2023-11-15 04:41:48",
+    "LastServiceCustomer": "2023-05-18 10:51:07",
+    "LastServiceTechnican": "2021-01-25 13:14:06",
+    "OutOfService": 0,
+    "RegenerationCountSinceSetup": 1505,
+    "RegenerationCounterColumn1": 754,
+    "RegenerationCounterColumn2": 751,
+    "RegenerativLevel": 20,
+    "RegenerativRemainingDays": 26,
+    "RegenerativSinceSetup_g": 245846,
+    "ShowError": 1,
+    "WaterSinceSetup_l": 261633,
+    "WaterTreatedCurrentDay_l": 181,
+    "WaterTreatedCurrentMonth_l": 3137,
+    "WaterTreatedCurrentYear_l": 80700,
+}
+
+DAILY_DATA = {
+    f"{min // 60:02}{min % 60:02}_{min // 60:02}{min % 60 + 29:02}_l": (min // 30) % 7
+    for min in range(0, 1440, 30)
+}
+
+MONTHLY_DATA = {f"Day{day:02}_l": 100 + day for day in range(1, 32)}
+
+YEARLY_DATA = {f"Month{month:02}_l": 3000 + month for month in range(1, 13)}
+
+SILK_REGISTERS = [
+    0, -1, 18, 23, 285, 29, 16, 2, 0, 9, 8, 1, 8, 4, 296, 158, 0, 52, 2138, 9, 40, 0, 100, 2275,
+    11, 20, 50, 1, 1, 0, 160, 141, 20, 0, 678, 1, -1, -1, 6, 1, 1, 15, 355, -1, -1, -1, -1, 0,
+]
+
+GATT = {
+    "0104": {
+        "ssid": "bwt", "rssi": -60, "rssiAvg": "-61", "rssiSig": "2", "dhcp": True, "ip": "10.0.0.2",
+        "sn": "255.255.255.0", "sg": "10.0.0.1", "pDns": "10.0.0.1", "sDns": None, "mac": "00:11:22:33:44:55",
+    },
+    "0201": {
+        "fwRev": "1.1.0+4", "hwRev": "2.4.0(B)", "productCode": "8R19-CX2A", "iotDevId": "sim",
+        "iotDevType": "smartdos", "iotDevVariant": "1", "uptime": 4889, "operatingTime": 706889,
+        "devState": 2001, "activeStates": [2001], "commDate": "2024-12-04T13:45:38.833Z",
+        "lifeTimeFlow_ml": 123456789, "lifeTimeDosed_ml": 12345,
+    },
+    "0202": {
+        "buzzerEn": True, "dosingRate": 2.5, "volumePerStroke": 0.05, "pouchEmptyTimeout": 600,
+        "pouchNotEmptyTimeout": 60, "aqaVolumeEn": False, "aqaWatchEn": False, "aqaMaxFlowEn": False,
+        "aqaVolumeVal": 0.0, "aqaWatchVal": 0, "aqaMaxFlowVal": 0.0, "restServerEn": True,
+    },
+    "0208": {"time": 1733319938, "timezone": "CET-1CEST,M3.5.0,M10.5.0/3"},
+    "0401": {"totCap": 10000, "expDate": "05.12.2025", "orderNr": 125123456, "batchNr": 12345, "id": 2, "unit": 0},
+    "0402": {"0": {"remCapacity": 8000.0, "remCapacityPct": 80.0, "remCapacityDays": 120, "unit": 0}},
+    "0503": {"flow": {"0": {"totFlow": 123456789, "totTicks": 4567}}},
+    "0505": {"dosedMineral": 12.5},
+}
+
+
+@dataclass
+class SimulatedDevice:
+    model: BwtModel
+    code: str = "code"  # login code of the Perla local API
+    latency: float = 0.0  # seconds before answering
+    latency_jitter: float = 0.0  # random extra seconds up to this value
+    slowdown: float = 1.0  # factor on the latency, change at runtime to simulate a struggling device
+    error_rate: float = 0.0  # share of requests answered with status 500
+    current: dict[str, Any] = field(default_factory=lambda: dict(CURRENT_DATA))
+    daily: dict[str, Any] = field(default_factory=lambda: dict(DAILY_DATA))
+    monthly: dict[str, Any] = field(default_factory=lambda: dict(MONTHLY_DATA))
+    yearly: dict[str, Any] = field(default_factory=lambda: dict(YEARLY_DATA))
+    registers: list[int] = field(default_factory=lambda: list(SILK_REGISTERS))
+    gatt: dict[str, Any] = field(default_factory=lambda: copy.deepcopy(GATT))
+    requests: int = 0  # number of requests received
+
+
+class _SimulatorResolver(AbstractResolver):
+    """Resolve simulated host names to the simulator server."""
+
+    def __init__(self, simulator: "DeviceSimulator"):
+        self._simulator = simulator
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET) -> list[ResolveResult]:
+        if host not in self._simulator.devices:
+            raise OSError(f"Unknown simulated host {host}")
+        return [ResolveResult(
+            hostname=host,
+            host=self._simulator.address,
+            port=self._simulator.port,
+            family=socket.AF_INET,
+            proto=0,
+            flags=socket.AI_NUMERICHOST,
+        )]
+
+    async def close(self) -> None:
+        pass
+
+
+class DeviceSimulator:
+    """aiohttp server emulating many Perla, Silk and Smart Dos devices."""
+
+    def __init__(self, devices: Mapping[str, SimulatedDevice] | None = None, address: str = "127.0.0.1", port: int = 0):
+        self.devices: dict[str, SimulatedDevice] = dict(devices or {})
+        self.address = address
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *err):
+        await self.stop()
+
+    def add(self, host: str, device: SimulatedDevice) -> SimulatedDevice:
+        self.devices[host] = device
+        return device
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("GET", "/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.address, self.port, backlog=1024)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def connector(self, **kwargs) -> aiohttp.TCPConnector:
+        """Connector that sends requests for the simulated hosts to the server."""
+        return aiohttp.TCPConnector(resolver=_SimulatorResolver(self), **kwargs)
+
+    def session(self, **kwargs) -> aiohttp.ClientSession:
+        """Session using the connector of the simulator, to pass to the api objects."""
+        return aiohttp.ClientSession(connector=self.connector(**kwargs))
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        host, _, port = (request.host or "").partition(":")
+        device = self.devices.get(host)
+        if device is None:
+            return web.Response(status=404, text="Not Found")
+        device.requests += 1
+
+        delay = (device.latency + random.uniform(0, device.latency_jitter)) * device.slowdown
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if device.error_rate and random.random() < device.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+
+        # Port 80 is left out of the host header
+        if port == "8080":
+            return self._perla(device, request)
+        return self._http(device, request.path)
+
+    def _perla(self, device: SimulatedDevice, request: web.Request) -> web.Response:
+        if device.model != BwtModel.PERLA_LOCAL_API:
+            return web.Response(status=404, text="")
+        endpoints = {
+            "/api/GetCurrentData": device.current,
+            "/api/GetDailyData": device.daily,
+            "/api/GetMonthlyData": device.monthly,
+            "/api/GetYearlyData": device.yearly,
+        }
+        if request.path not in endpoints:
+            return web.Response(status=404, text="Not Found")
+        expected = base64.b64encode(f"user:{device.code}".encode("ascii")).decode("ascii")
+        if request.headers.get("Authorization") != f"Basic {expected}":
+            # The device answers a wrong code with an empty 404
+            return web.Response(status=404, text="")
+        return _json(endpoints[request.path])
+
+    def _http(self, device: SimulatedDevice, path: str) -> web.Response:
+        if device.model == BwtModel.PERLA_SILK and path == "/silk/registers":
+            return _json({"params": device.registers})
+        if device.model == BwtModel.SMART_DOS and path.startswith("/api/v1/gatt/"):
+            value = device.gatt.get(path.removeprefix("/api/v1/gatt/"))
+            if value is not None:
+                return _json(value)
+        return web.Response(status=404, text="Not Found")
+
+
+def _json(value: Any) -> web.Response:
+    # Compact like the devices, the model detection relies on it
+    return web.Response(body=json.dumps(value, separators=(",", ":")).encode(), content_type="application/json")
@@ -1,9 +1,11 @@
 """The BWT Smart Dos API class."""
 
-from collections.abc import Mapping
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Mapping
 
 import aiohttp
+import asyncio
 import logging
+import time
 from typing import Any
 
 from bwt_api.data import (
@@ -17,18 +19,63 @@ from bwt_api.data import (
     RemainingCapacityResponse,
     TreatedWaterResponse,
     SubstanceDosageResponse,
+    SmartDosSnapshot,
 )
+from bwt_api.cache import ResponseCache
+from bwt_api.coalesce import RequestCoalescer
+from bwt_api.decode import DEFAULT_DECODER, JsonDecoder
 from bwt_api.exception import ApiException, ConnectException
+from bwt_api.retry import NO_RETRY, CircuitBreaker, RetryPolicy, call_with_retry
+from bwt_api.scheduler import HostScheduler
+from bwt_api.timeout import DEFAULT_TIMEOUTS, Timeouts, current_timeouts
+from bwt_api.watch import AdaptiveInterval, poll
+
+
+# All characteristics with a typed response, in the order of the api methods
+SNAPSHOT_UUIDS = ("0104", "0201", "0202", "0208", "0401", "0402", "0503", "0505")
 
 
 class BwtSmartDosApi:
     """BWT Smart Dos Api."""
     _session: aiohttp.ClientSession
+    _owns_session: bool
     _host: str
 
-    def __init__(self, host: str, logger: logging.Logger = logging.getLogger(__name__)):
+    def __init__(
+        self,
+        host: str,
+        logger: logging.Logger = logging.getLogger(__name__),
+        session: aiohttp.ClientSession | None = None,
+        connector: aiohttp.BaseConnector | None = None,
+        cache: ResponseCache | None = None,
+        coalescer: RequestCoalescer | None = None,
+        scheduler: HostScheduler | None = None,
+        timeouts: Timeouts = DEFAULT_TIMEOUTS,
+        retry: RetryPolicy = NO_RETRY,
+        circuit_breaker: CircuitBreaker | None = None,
+        decoder: JsonDecoder = DEFAULT_DECODER,
+    ):
+        """Create the api. A passed session is shared and not closed by close().
+
+        With a cache, characteristics are reused according to the ttl of their UUID.
+        Concurrent calls share one request, also across api objects with a shared coalescer.
+        A scheduler limits and prioritizes the requests sent to the device.
+        The timeouts can be overridden per call with bwt_api.timeout.deadline().
+        Failed requests are retried according to retry, a circuit breaker lets requests
+        to an unreachable host fail fast. The decoder parses the raw response bodies.
+        """
         self._host = host
-        self._session = aiohttp.ClientSession()
+        self._owns_session = session is None
+        if session is None:
+            session = aiohttp.ClientSession(connector=connector, connector_owner=connector is None)
+        self._session = session
+        self._cache = cache
+        self._coalescer = coalescer if coalescer is not None else RequestCoalescer()
+        self._scheduler = scheduler
+        self._timeouts = timeouts
+        self._retry = retry
+        self._circuit_breaker = circuit_breaker
+        self._decoder = decoder
         self._logger = logger
 
     async def __aenter__(self):
@@ -38,128 +85,249 @@ class BwtSmartDosApi:
         await self.close()
 
     async def close(self):
-        await self._session.close()
+        if self._owns_session:
+            await self._session.close()
 
     async def _get_gatt(self, uuid: str) -> dict[str, Any]:
+        """Internal method to fetch GATT characteristic JSON, using the cache if configured."""
+        if self._cache is not None:
+            return await self._cache.get_or_load(self._host, uuid, lambda: self._load_gatt(uuid))
+        return await self._load_gatt(uuid)
+
+    async def _load_gatt(self, uuid: str) -> dict[str, Any]:
+        """Internal method to join an in-flight request for the UUID or start one."""
+        return await self._coalescer.run(
+            (self._host, uuid),
+            lambda: call_with_retry(lambda: self._fetch_gatt(uuid), self._retry, self._circuit_breaker),
+        )
+
+    async def _fetch_gatt(self, uuid: str) -> dict[str, Any]:
+        """Internal method to send the request once the scheduler allows it."""
+        if self._scheduler is None:
+            return await self._request_gatt(uuid)
+        async with self._scheduler.slot(uuid):
+            return await self._request_gatt(uuid)
+
+    async def _request_gatt(self, uuid: str) -> dict[str, Any]:
         """Internal method to fetch GATT characteristic JSON."""
+        timeouts = current_timeouts(self._timeouts)
+        start = time.monotonic()
         try:
-            async with self._session.get(f"http://{self._host}:80/api/v1/gatt/{uuid}") as response:
+            async with self._session.get(f"http://{self._host}:80/api/v1/gatt/{uuid}", timeout=timeouts.client_timeout()) as response:
                 self._logger.debug(
                     "Response status: %s, content-type: %s",
                     response.status,
                     response.headers['content-type']
                 )
                 if response.status == 200:
-                    json = await response.json(content_type=None)
+                    json = self._decoder(await response.read())
                     self._logger.debug("Raw response for UUID %s: %s", uuid, json)
                     return json
                 text = await response.text()
                 self._logger.warning("Unknown response with status %s: %s", response.status, text)
                 raise ApiException(f"Unknown response: {text}")
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            raise timeouts.exceeded(e, time.monotonic() - start) from e
         except aiohttp.ClientConnectorError as e:
             raise ConnectException from e
+        except ValueError as e:
+            raise ApiException from e
 
     async def get_wifi_info(self) -> WifiResponse:
         """UUID 0104: Get Wi-Fi name and signal strength."""
         self._logger.debug("Fetching Wi-Fi info from %s", self._host)
-        raw = await self._get_gatt("0104")
-        return WifiResponse(
-            ssid=raw["ssid"], 
-            rssi=raw["rssi"],
-            rssiAvg=raw["rssiAvg"],
-            rssiSig=raw["rssiSig"],
-            dhcp=raw["dhcp"],
-            ip=raw["ip"],
-            sn=raw["sn"],
-            sg=raw["sg"],
-            pDns=raw["pDns"],
-            sDns=raw["sDns"],
-            mac=raw["mac"]
-        )
+        return _parse_wifi_info(await self._get_gatt("0104"))
 
     async def get_device_info(self) -> DeviceInfoResponse:
         """UUID 0201: Get device information."""
         self._logger.debug("Fetching device info from %s", self._host)
-        raw = await self._get_gatt("0201")
-        return DeviceInfoResponse(
-            fw_rev=raw["fwRev"],
-            hw_rev=raw["hwRev"],
-            product_code=raw["productCode"],
-            device_id=raw["iotDevId"],
-            device_type=raw["iotDevType"],
-            device_variant=raw["iotDevVariant"],
-            uptime=raw["uptime"],
-            operating_time=raw["operatingTime"],
-            dev_state=SmartDosStatus(raw["devState"]),
-            active_states=[SmartDosStatus(state) for state in raw["activeStates"]],
-            comm_date=raw["commDate"],
-            total_flow=raw["lifeTimeFlow_ml"],
-            total_dosed=raw["lifeTimeDosed_ml"],
-        )
+        return _parse_device_info(await self._get_gatt("0201"))
 
     async def get_configuration(self) -> ConfigurationResponse:
         """UUID 0202: Get device configuration."""
         self._logger.debug("Fetching configuration from %s", self._host)
-        raw = await self._get_gatt("0202")
-        return ConfigurationResponse(
-            buzzer_en=raw["buzzerEn"],
-            dosing_rate=raw["dosingRate"],
-            volume_per_stroke=raw["volumePerStroke"],
-            pouch_empty_timeout=raw["pouchEmptyTimeout"],
-            pouch_not_empty_timeout=raw["pouchNotEmptyTimeout"],
-            aqa_volume_en=raw["aqaVolumeEn"],
-            aqa_watch_en=raw["aqaWatchEn"],
-            aqa_max_flow_en=raw["aqaMaxFlowEn"],
-            aqa_volume_val=raw["aqaVolumeVal"],
-            aqa_watch_val=raw["aqaWatchVal"],
-            aqa_max_flow_val=raw["aqaMaxFlowVal"],
-            rest_server_en=raw["restServerEn"],
-        )
+        return _parse_configuration(await self._get_gatt("0202"))
 
     async def get_time_info(self) -> TimeResponse:
         """UUID 0208: Get time and timezone information."""
         self._logger.debug("Fetching time info from %s", self._host)
-        raw = await self._get_gatt("0208")
-        return TimeResponse(time=raw["time"], timezone=raw["timezone"])
+        return _parse_time_info(await self._get_gatt("0208"))
 
     async def get_pouch_info(self) -> PouchInfoResponse:
         """UUID 0401: Get pouch/container information."""
         self._logger.debug("Fetching pouch info from %s", self._host)
-        raw = await self._get_gatt("0401")
-        return PouchInfoResponse(
-            tot_cap=raw["totCap"],
-            exp_date=raw["expDate"],
-            order_nr=raw["orderNr"],
-            batch_nr=raw["batchNr"],
-            substance_type=SubstanceType(raw["id"]),
-            unit=raw["unit"],
-        )
+        return _parse_pouch_info(await self._get_gatt("0401"))
 
     async def get_remaining_capacity(self) -> Mapping[int, RemainingCapacityResponse]:
         """UUID 0402: Get remaining capacity information."""
         self._logger.debug("Fetching remaining capacity from %s", self._host)
-        raw = await self._get_gatt("0402")
-        return {int(k): RemainingCapacityResponse(
-            rem_capacity=v["remCapacity"],
-            rem_capacity_pct=v["remCapacityPct"],
-            rem_capacity_days=v["remCapacityDays"],
-            unit=v["unit"]) for k, v in raw.items()}
+        return _parse_remaining_capacity(await self._get_gatt("0402"))
 
     async def get_treated_water(self) -> Mapping[int, TreatedWaterResponse]:
         """UUID 0503: Get treated water information."""
         self._logger.debug("Fetching treated water from %s", self._host)
-        raw = await self._get_gatt("0503")
-        return {int(k): TreatedWaterResponse(
-            total_flow=v["totFlow"],
-            total_ticks=v["totTicks"],
-            ) for k, v in raw["flow"].items()}
+        return _parse_treated_water(await self._get_gatt("0503"))
 
     async def get_substance_dosage(self) -> SubstanceDosageResponse:
         """UUID 0505: Get substance dosage information."""
         self._logger.debug("Fetching substance dosage from %s", self._host)
-        raw = await self._get_gatt("0505")
-        return SubstanceDosageResponse(dosed_mineral=raw["dosedMineral"])
+        return _parse_substance_dosage(await self._get_gatt("0505"))
 
     async def get_gatt_0201(self) -> dict[str, Any]:
         """Fetch the Smart Dos GATT 0201 characteristic JSON (raw)."""
         return await self._get_gatt("0201")
+
+    def watch(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        backoff: float = 2.0,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> AsyncIterator[DeviceInfoResponse]:
+        """Poll the device state (UUID 0201) with an adaptive interval.
+
+        The interval drops to min_interval while metering or when the active states
+        change and grows by backoff up to max_interval while the device is idle.
+        Connection and api errors are logged and retried with the idle backoff, see
+        watch.poll. sleep waits between the polls.
+        """
+        return poll(
+            self.get_device_info,
+            lambda info, previous: info.dev_state == SmartDosStatus.METERING_ACTIVE
+            or (previous is not None and info.active_states != previous.active_states),
+            AdaptiveInterval(min_interval, max_interval, backoff),
+            self._logger,
+            sleep,
+        )
+
+    async def get_snapshot(
+        self, uuids: Iterable[str] = SNAPSHOT_UUIDS, max_in_flight: int = 2
+    ) -> SmartDosSnapshot:
+        """Fetch several characteristics concurrently into one snapshot.
+
+        At most max_in_flight requests are sent to the device at the same time. A failing
+        characteristic is recorded in the errors of the snapshot and does not fail the call.
+        Unknown UUIDs raise ValueError before any request is sent.
+        """
+        uuids = list(dict.fromkeys(uuids))
+        unknown = [uuid for uuid in uuids if uuid not in _SNAPSHOT_PARSERS]
+        if unknown:
+            raise ValueError(f"No snapshot field for UUIDs {unknown}, known are {list(_SNAPSHOT_PARSERS)}")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self._logger.debug("Fetching snapshot of %s from %s", uuids, self._host)
+        snapshot = SmartDosSnapshot()
+        limit = asyncio.Semaphore(max_in_flight)
+
+        async def fetch(uuid: str):
+            async with limit:
+                try:
+                    raw = await self._get_gatt(uuid)
+                    if uuid == "0201":
+                        snapshot.gatt_0201 = raw
+                    field, parse = _SNAPSHOT_PARSERS[uuid]
+                    setattr(snapshot, field, parse(raw))
+                except Exception as e:
+                    self._logger.debug("Snapshot of UUID %s failed: %r", uuid, e)
+                    snapshot.errors[uuid] = e
+
+        await asyncio.gather(*(fetch(uuid) for uuid in uuids))
+        return snapshot
+
+
+def _parse_wifi_info(raw: dict[str, Any]) -> WifiResponse:
+    return WifiResponse(
+        ssid=raw["ssid"],
+        rssi=raw["rssi"],
+        rssiAvg=raw["rssiAvg"],
+        rssiSig=raw["rssiSig"],
+        dhcp=raw["dhcp"],
+        ip=raw["ip"],
+        sn=raw["sn"],
+        sg=raw["sg"],
+        pDns=raw["pDns"],
+        sDns=raw["sDns"],
+        mac=raw["mac"]
+    )
+
+
+def _parse_device_info(raw: dict[str, Any]) -> DeviceInfoResponse:
+    return DeviceInfoResponse(
+        fw_rev=raw["fwRev"],
+        hw_rev=raw["hwRev"],
+        product_code=raw["productCode"],
+        device_id=raw["iotDevId"],
+        device_type=raw["iotDevType"],
+        device_variant=raw["iotDevVariant"],
+        uptime=raw["uptime"],
+        operating_time=raw["operatingTime"],
+        dev_state=SmartDosStatus(raw["devState"]),
+        active_states=[SmartDosStatus(state) for state in raw["activeStates"]],
+        comm_date=raw["commDate"],
+        total_flow=raw["lifeTimeFlow_ml"],
+        total_dosed=raw["lifeTimeDosed_ml"],
+    )
+
+
+def _parse_configuration(raw: dict[str, Any]) -> ConfigurationResponse:
+    return ConfigurationResponse(
+        buzzer_en=raw["buzzerEn"],
+        dosing_rate=raw["dosingRate"],
+        volume_per_stroke=raw["volumePerStroke"],
+        pouch_empty_timeout=raw["pouchEmptyTimeout"],
+        pouch_not_empty_timeout=raw["pouchNotEmptyTimeout"],
+        aqa_volume_en=raw["aqaVolumeEn"],
+        aqa_watch_en=raw["aqaWatchEn"],
+        aqa_max_flow_en=raw["aqaMaxFlowEn"],
+        aqa_volume_val=raw["aqaVolumeVal"],
+        aqa_watch_val=raw["aqaWatchVal"],
+        aqa_max_flow_val=raw["aqaMaxFlowVal"],
+        rest_server_en=raw["restServerEn"],
+    )
+
+
+def _parse_time_info(raw: dict[str, Any]) -> TimeResponse:
+    return TimeResponse(time=raw["time"], timezone=raw["timezone"])
+
+
+def _parse_pouch_info(raw: dict[str, Any]) -> PouchInfoResponse:
+    return PouchInfoResponse(
+        tot_cap=raw["totCap"],
+        exp_date=raw["expDate"],
+        order_nr=raw["orderNr"],
+        batch_nr=raw["batchNr"],
+        substance_type=SubstanceType(raw["id"]),
+        unit=raw["unit"],
+    )
+
+
+def _parse_remaining_capacity(raw: dict[str, Any]) -> Mapping[int, RemainingCapacityResponse]:
+    return {int(k): RemainingCapacityResponse(
+        rem_capacity=v["remCapacity"],
+        rem_capacity_pct=v["remCapacityPct"],
+        rem_capacity_days=v["remCapacityDays"],
+        unit=v["unit"]) for k, v in raw.items()}
+
+
+def _parse_treated_water(raw: dict[str, Any]) -> Mapping[int, TreatedWaterResponse]:
+    return {int(k): TreatedWaterResponse(
+        total_flow=v["totFlow"],
+        total_ticks=v["totTicks"],
+        ) for k, v in raw["flow"].items()}
+
+
+def _parse_substance_dosage(raw: dict[str, Any]) -> SubstanceDosageResponse:
+    return SubstanceDosageResponse(dosed_mineral=raw["dosedMineral"])
+
+
+# UUID -> (snapshot field, parser)
+_SNAPSHOT_PARSERS = {
+    "0104": ("wifi", _parse_wifi_info),
+    "0201": ("device_info", _parse_device_info),
+    "0202": ("configuration", _parse_configuration),
+    "0208": ("time", _parse_time_info),
+    "0401": ("pouch", _parse_pouch_info),
+    "0402": ("remaining_capacity", _parse_remaining_capacity),
+    "0503": ("treated_water", _parse_treated_water),
+    "0505": ("substance_dosage", _parse_substance_dosage),
+}
@@ -0,0 +1,225 @@
+"""Append-only columnar storage of polled samples in memory-mapped files.
+
+A store is a directory with one file per column, a timestamp column and a file with
+the number of committed samples. Values are written before the count, so after a
+crash a partly written sample is ignored and overwritten by the next append.
+
+    with ColumnStore("history/perla-1", CURRENT_SCHEMA) as store:
+        store.append(time.time(), await api.get_current_data())
+        flows = store.range(start, end)["current_flow"]
+
+Range reads return memoryviews of the mapped files without copying. Files use the
+native byte order. Datetimes are stored as seconds since 1970 of their wall clock
+time like in bwt_api.binary, independent of the local timezone.
+"""
+
+import calendar
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from bwt_api.data import CurrentResponse
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    typecode: str  # array typecode
+    width: int = 1  # values per sample
+
+
+@dataclass(frozen=True)
+class Schema:
+    columns: tuple[Column, ...]
+    extract: Callable[[Any], Sequence[float]]  # sample -> values of all columns in order
+
+
+def _timestamp(value: datetime) -> int:
+    return calendar.timegm(value.timetuple())
+
+
+# CurrentResponse field -> typecode, value
+_CURRENT_COLUMNS: dict[str, tuple[str, Callable[[CurrentResponse], float]]] = {
+    "blended_total": ("q", lambda r: r.blended_total),
+    "capacity_1": ("q", lambda r: r.capacity_1),
+    "capacity_2": ("q", lambda r: r.capacity_2),
+    "current_flow": ("i", lambda r: r.current_flow),
+    "dosing_total": ("q", lambda r: r.dosing_total),
+    "in_hardness_dH": ("i", lambda r: r.in_hardness.dH),
+    "out_hardness_dH": ("i", lambda r: r.out_hardness.dH),
+    "holiday_mode": ("q", lambda r: r.holiday_mode),
+    "regeneration_last_1": ("q", lambda r: _timestamp(r.regeneration_last_1)),
+    "regeneration_last_2": ("q", lambda r: _timestamp(r.regeneration_last_2)),
+    "out_of_service": ("i", lambda r: r.out_of_service),
+    "regeneration_count_1": ("i", lambda r: r.regeneration_count_1),
+    "regeneration_count_2": ("i", lambda r: r.regeneration_count_2),
+    "regeneration_count": ("i", lambda r: r.regeneration_count),
+    "regenerativ_level": ("i", lambda r: r.regenerativ_level),
+    "regenerativ_days": ("i", lambda r: r.regenerativ_days),
+    "regenerativ_total": ("q", lambda r: r.regenerativ_total),
+    "state": ("i", lambda r: r.state.value),
+    "treated_day": ("i", lambda r: r.treated_day),
+    "treated_month": ("i", lambda r: r.treated_month),
+    "treated_year": ("i", lambda r: r.treated_year),
+}
+
+CURRENT_SCHEMA = Schema(
+    tuple(Column(name, typecode) for name, (typecode, _) in _CURRENT_COLUMNS.items()),
+    lambda response: [value(response) for _, value in _CURRENT_COLUMNS.values()],
+)
+
+# One sample per day with the 48 half-hour values
+DAILY_SCHEMA = Schema((Column("values", "i", 48),), lambda response: response.values)
+
+# One channel of the Smart Dos treated water, e.g. get_treated_water()[0]
+TREATED_WATER_SCHEMA = Schema(
+    (Column("total_flow", "q"), Column("total_ticks", "q")),
+    lambda response: (response.total_flow, response.total_ticks),
+)
+
+_TIMESTAMP = Column("timestamp", "d")
+_COUNT = struct.Struct("=Q")
+
+
+def _open(path: str):
+    return open(path, "r+b" if os.path.exists(path) else "w+b")
+
+
+class _MappedColumn:
+    def __init__(self, path: str, column: Column):
+        self.column = column
+        self.row_size = array(column.typecode).itemsize * column.width
+        self._format = struct.Struct(f"={column.width}{column.typecode}")
+        self._file = _open(path)
+        self.rows = os.fstat(self._file.fileno()).st_size // self.row_size
+        self._map = None
+
+    def reserve(self, rows: int):
+        if self._map is not None and rows <= self.rows:
+            return
+        self._file.truncate(rows * self.row_size)
+        # Views of the old map keep it alive, it is unmapped once they are gone
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.rows = rows
+
+    def write(self, index: int, values: Sequence[float]):
+        self._format.pack_into(self._map, index * self.row_size, *values)
+
+    def view(self, start: int, stop: int) -> memoryview:
+        return memoryview(self._map)[start * self.row_size:stop * self.row_size].cast(self.column.typecode)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # Still exported as view, unmapped when the views are released
+            pass
+        self._file.close()
+
+
+class ColumnStore:
+    """Append-only store of samples with a schema in a directory.
+
+    Timestamps must not decrease. With sync each append is flushed to disk before
+    it counts as committed, otherwise only a crash of the process is survived.
+    """
+
+    def __init__(self, path: str, schema: Schema, sync: bool = False, capacity: int = 1024):
+        self._schema = schema
+        self._width = sum(column.width for column in schema.columns)
+        self._sync = sync
+        os.makedirs(path, exist_ok=True)
+        self._check_schema(os.path.join(path, "schema.json"))
+        self._count_file = _open(os.path.join(path, "count"))
+        self._count_file.truncate(_COUNT.size)
+        self._count_map = mmap.mmap(self._count_file.fileno(), _COUNT.size)
+        self._columns = [
+            _MappedColumn(os.path.join(path, f"{column.name}.col"), column)
+            for column in (_TIMESTAMP, *schema.columns)
+        ]
+        # A column shorter than the count was not fully written before a crash
+        self._count = min(_COUNT.unpack_from(self._count_map)[0], *(column.rows for column in self._columns))
+        # A crash while growing can leave columns of different sizes
+        capacity = max(capacity, *(column.rows for column in self._columns))
+        for column in self._columns:
+            column.reserve(capacity)
+        self._last = self._columns[0].view(self._count - 1, self._count)[0] if self._count else float("-inf")
+
+    def _check_schema(self, path: str):
+        layout = [[column.name, column.typecode, column.width] for column in self._schema.columns]
+        if os.path.exists(path):
+            with open(path) as f:
+                if json.load(f) != layout:
+                    raise ValueError(f"{path} does not match the schema")
+            return
+        with open(path + ".tmp", "w") as f:
+            json.dump(layout, f)
+        os.replace(path + ".tmp", path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *err):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, sample: Any):
+        """Append a sample, e.g. a CurrentResponse for CURRENT_SCHEMA."""
+        if timestamp < self._last:
+            raise ValueError(f"Timestamp {timestamp} is before the last sample {self._last}")
+        values = self._schema.extract(sample)
+        if len(values) != self._width:
+            raise ValueError(f"Sample has {len(values)} values, the schema needs {self._width}")
+        index = self._count
+        if index >= self._columns[0].rows:
+            for column in self._columns:
+                column.reserve(2 * column.rows)
+        self._columns[0].write(index, (timestamp,))
+        offset = 0
+        for column in self._columns[1:]:
+            width = column.column.width
+            try:
+                column.write(index, values[offset:offset + width])
+            except struct.error as e:
+                # Not committed, the next append overwrites the values written so far
+                raise ValueError(f"Values of {column.column.name} do not fit: {e}") from e
+            offset += width
+        if self._sync:
+            for column in self._columns:
+                column.flush()
+        _COUNT.pack_into(self._count_map, 0, index + 1)
+        if self._sync:
+            self._count_map.flush()
+        self._count = index + 1
+        self._last = timestamp
+
+    def range(self, start: float = float("-inf"), end: float = float("inf")) -> dict[str, memoryview]:
+        """Columns of the samples with start <= timestamp < end, including timestamp.
+
+        Columns with a width above 1 hold width values per sample one after another.
+        """
+        timestamps = self._columns[0].view(0, self._count)
+        first = bisect_left(timestamps, start)
+        last = bisect_left(timestamps, end, first)
+        return {column.column.name: column.view(first, last) for column in self._columns}
+
+    def close(self):
+        for column in self._columns:
+            column.close()
+        try:
+            self._count_map.close()
+        except BufferError:
+            pass
+        self._count_file.close()
@@ -0,0 +1,31 @@
+"""Helpers for tests and benchmarks of code using the api classes, not needed otherwise."""
+
+import json
+from collections.abc import Mapping
+from typing import Any
+
+from bwt_api.recording import RecordedResponse
+
+
+class StaticSession:
+    """Answer every request with a fixed JSON body per URL path, without any network.
+
+    The paths are the part of the URL after the host, e.g. "api/GetCurrentData".
+    Unknown paths are answered with status 404. Meant for benchmarks and tests of
+    the decode paths.
+    """
+
+    def __init__(self, bodies: Mapping[str, Any]):
+        headers = {"content-type": "application/json"}
+        self._responses = {
+            path: RecordedResponse(200, headers, json.dumps(body).encode()) for path, body in bodies.items()
+        }
+        self._not_found = RecordedResponse(404, {"content-type": "text/plain"}, b"Not Found")
+        self.closed = False
+
+    def get(self, url: str, **kwargs) -> RecordedResponse:
+        # The responses hold no state, so they are served again and again
+        return self._responses.get(url.split("/", 3)[3], self._not_found)
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,56 @@
+"""Latency budgets for the api requests."""
+
+import contextvars
+import dataclasses
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import aiohttp
+
+from bwt_api.exception import DeadlineExceededException
+
+
+@dataclass(frozen=True)
+class Timeouts:
+    """Latency budgets in seconds, None disables a budget."""
+    connect: float | None = 5  # until the socket is connected, waiting for a pooled connection only counts for total
+    read: float | None = 10  # max idle time between two reads from the socket, not a limit for the whole body
+    total: float | None = 15  # whole request including reading the body
+
+    def client_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.total, sock_connect=self.connect, sock_read=self.read)
+
+    def exceeded(self, error: BaseException, elapsed: float) -> DeadlineExceededException:
+        """Build the exception for a timeout error raised by aiohttp."""
+        if isinstance(error, aiohttp.ConnectionTimeoutError):
+            return DeadlineExceededException("connect", self.connect, elapsed)
+        if isinstance(error, aiohttp.SocketTimeoutError):
+            return DeadlineExceededException("read", self.read, elapsed)
+        return DeadlineExceededException("total", self.total, elapsed)
+
+
+DEFAULT_TIMEOUTS = Timeouts()
+
+_overrides: contextvars.ContextVar[dict[str, float | None]] = contextvars.ContextVar("bwt_api_timeouts", default={})
+
+
+@contextmanager
+def deadline(**budgets: float | None):
+    """Override budgets of the instance for all calls inside the with block.
+
+    Example: with deadline(total=2): await api.get_current_data()
+    """
+    unknown = budgets.keys() - {f.name for f in dataclasses.fields(Timeouts)}
+    if unknown:
+        raise TypeError(f"Unknown budgets {sorted(unknown)}")
+    token = _overrides.set({**_overrides.get(), **budgets})
+    try:
+        yield
+    finally:
+        _overrides.reset(token)
+
+
+def current_timeouts(timeouts: Timeouts) -> Timeouts:
+    """Apply the overrides of the current call to the budgets of an instance."""
+    overrides = _overrides.get()
+    return dataclasses.replace(timeouts, **overrides) if overrides else timeouts
@@ -0,0 +1,63 @@
+"""Adaptive poll intervals for the watch generators of the api classes."""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
+
+from bwt_api.exception import ApiException, CircuitOpenException, ConnectException
+
+T = TypeVar("T")
+
+# Errors of a poll that are logged and retried instead of ending the watch
+TRANSIENT_ERRORS = (ConnectException, ApiException)
+
+
+class AdaptiveInterval:
+    """Poll fast while the device is active and back off exponentially while idle."""
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 60.0, backoff: float = 2.0):
+        if min_interval <= 0 or max_interval < min_interval or backoff < 1:
+            raise ValueError("Need 0 < min_interval <= max_interval and backoff >= 1")
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._backoff = backoff
+        self.interval = min_interval
+
+    def next(self, active: bool) -> float:
+        """Seconds to wait before the next poll."""
+        if active:
+            self.interval = self._min_interval
+        else:
+            self.interval = min(self._max_interval, self.interval * self._backoff)
+        return self.interval
+
+
+async def poll(
+    load: Callable[[], Awaitable[T]],
+    is_active: Callable[[T, T | None], bool],
+    interval: AdaptiveInterval,
+    logger: logging.Logger,
+    sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+) -> AsyncIterator[T]:
+    """Yield load() with the adaptive interval, is_active(value, previous) picks the next one.
+
+    A poll failing with one of TRANSIENT_ERRORS is logged and retried after the idle
+    backoff, or once an open circuit lets requests through again. Other errors end
+    the generator.
+    """
+    previous = None
+    while True:
+        try:
+            value = await load()
+        except TRANSIENT_ERRORS as e:
+            delay = interval.next(False)
+            if isinstance(e, CircuitOpenException):
+                delay = max(delay, e.retry_after)
+            logger.warning("Poll failed, retrying in %.1fs: %s", delay, e)
+            await sleep(delay)
+            continue
+        yield value
+        active = is_active(value, previous)
+        previous = value
+        await sleep(interval.next(active))
@@ -8,3 +8,17 @@
 """
 
 # import pytest
+
+from unittest.mock import Mock
+
+from aiohttp.client_reqrep import ClientResponse
+
+# Compatibility shim for aioresponses with aiohttp 3.14+.
+_original_client_response_init = ClientResponse.__init__
+
+def _compat_client_response_init(self, method, url, *args, stream_writer=None, **kwargs):
+    if stream_writer is None:
+        stream_writer = Mock(output_size=0)
+    return _original_client_response_init(self, method, url, *args, stream_writer=stream_writer, **kwargs)
+
+ClientResponse.__init__ = _compat_client_response_init
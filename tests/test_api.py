@@ -1,25 +1,18 @@
+import json
+from dataclasses import fields
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from unittest.mock import Mock
+import aiohttp
 import pytest
-from aiohttp.client_reqrep import ClientResponse
+from yarl import URL
 
 from bwt_api.api import BwtApi, BwtSmartDosApi, treated_to_blended
-from bwt_api.error import BwtError
+from bwt_api.bwt_api import CurrentResponseView
+from bwt_api.error import BwtError, ErrorEvent, any_fatal, diff_errors, error_mask, mask_errors
 from bwt_api.data import CurrentResponse, Hardness, BwtStatus, SmartDosStatus, SubstanceType
 
 from aioresponses import aioresponses
 
-# Compatibility shim for aioresponses with aiohttp 3.14+.
-_original_client_response_init = ClientResponse.__init__
-
-def _compat_client_response_init(self, method, url, *args, stream_writer=None, **kwargs):
-    if stream_writer is None:
-        stream_writer = Mock(output_size=0)
-    return _original_client_response_init(self, method, url, *args, stream_writer=stream_writer, **kwargs)
-
-ClientResponse.__init__ = _compat_client_response_init
-
 from bwt_api.exception import ApiException, ConnectException, WrongCodeException
 
 __author__ = "dkarv"
@@ -300,6 +293,29 @@ def test_unknown_error_no_mutation():
     # Different unknown codes produce different instances
     assert err1 is not err2
 
+
+def test_error_mask():
+    errors = [BwtError.UNKNOWN, BwtError.REGENERATIV_20, BwtError.MAINTENANCE_CUSTOMER, BwtError(123)]
+    mask = error_mask(errors)
+    assert mask_errors(mask) == errors
+    assert any_fatal(mask)
+    assert not any_fatal(error_mask([BwtError.REGENERATIV_20, BwtError.MINERALS_LOW]))
+    assert not any_fatal(0)
+    assert BwtError.REGENERATIV_0.is_fatal()
+    assert not BwtError.REGENERATIV_20.is_fatal()
+
+    view = CurrentResponseView({"ActiveErrorIDs": "5,32"})
+    assert view.error_mask == error_mask([BwtError.REGENERATIV_20, BwtError.MAINTENANCE_CUSTOMER])
+
+    events = list(diff_errors(mask, error_mask([BwtError.REGENERATIV_20, BwtError.REGENERATIV_0])))
+    assert events == [
+        ErrorEvent(BwtError.REGENERATIV_0, True),
+        ErrorEvent(BwtError.UNKNOWN, False),
+        ErrorEvent(BwtError.MAINTENANCE_CUSTOMER, False),
+        ErrorEvent(BwtError(123), False),
+    ]
+
+
 async def test_smartdos_get_gatt_0201():
     with aioresponses() as mocked:
         mocked.get(
@@ -355,3 +371,71 @@ def test_treated_to_blended():
     assert treated_to_blended(191, 21, 4) == pytest.approx(235.9411)
     # Edge case: hardness_in == 0 should return treated as-is, not divide by zero
     assert treated_to_blended(100, 0, 0) == 100
+
+
+async def test_shared_session_not_closed():
+    with aioresponses() as mocked:
+        mocked.get("http://host:8080/api/GetCurrentData", status=404, body="")
+        async with aiohttp.ClientSession() as session:
+            async with BwtApi("host", "code", session=session) as api:
+                with pytest.raises(WrongCodeException):
+                    await api.get_current_data()
+            assert not session.closed
+            call = mocked.requests[("GET", URL("http://host:8080/api/GetCurrentData"))][0]
+            assert call.kwargs["headers"]["Authorization"] == "Basic dXNlcjpjb2Rl"
+
+
+async def test_smartdos_snapshot_partial():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/api/v1/gatt/0208", status=200, body='{"time":1700000000,"timezone":"CET"}')
+        mocked.get("http://host:80/api/v1/gatt/0505", status=200, body='{"dosedMineral":12.5}')
+        mocked.get("http://host:80/api/v1/gatt/0401", status=500, body="Error")
+        async with BwtSmartDosApi("host") as api:
+            result = await api.get_snapshot(uuids=("0208", "0505", "0401"), max_in_flight=1)
+            assert result.time.timezone == "CET"
+            assert result.substance_dosage.dosed_mineral == 12.5
+            assert result.pouch is None
+            assert isinstance(result.errors["0401"], ApiException)
+            assert list(result.errors) == ["0401"]
+
+
+async def test_smartdos_snapshot_unknown_uuid():
+    with aioresponses() as mocked:
+        async with BwtSmartDosApi("host") as api:
+            with pytest.raises(ValueError, match="0999"):
+                await api.get_snapshot(uuids=("0208", "0999"))
+            with pytest.raises(ValueError):
+                await api.get_snapshot(max_in_flight=0)
+        assert not mocked.requests
+
+
+async def test_current_view():
+    with aioresponses() as mocked:
+        mocked.get("http://host:8080/api/GetCurrentData", status=200, body=current_json, repeat=True)
+        async with BwtApi("host", "code") as api:
+            view = await api.get_current_view()
+            assert view.current_flow == 0
+            assert "regeneration_last_1" not in vars(view)
+            assert view.regeneration_last_1 == datetime(2023, 11, 16, 4, 42, 15)
+            assert view.to_response() == await api.get_current_data()
+            with pytest.raises(AttributeError):
+                view.unknown
+
+
+@pytest.mark.parametrize(
+    "body", [current_json, current_json_empty_errors, current_json_perla_one], ids=["errors", "no_errors", "perla_one"]
+)
+async def test_current_view_matches_current_data(body):
+    with aioresponses() as mocked:
+        mocked.get("http://host:8080/api/GetCurrentData", status=200, body=body, repeat=True)
+        async with BwtApi("host", "code") as api:
+            eager = await api.get_current_data()
+            view = await api.get_current_view()
+            for field in fields(CurrentResponse):
+                assert getattr(view, field.name) == getattr(eager, field.name), field.name
+            assert view == eager
+            assert eager == view
+            assert view == await api.get_current_view()
+            assert view.to_response() == eager
+            assert view.error_mask == eager.error_mask
+            assert view != CurrentResponseView({**json.loads(body), "WaterTreatedCurrentDay_l": -1})
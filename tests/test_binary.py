@@ -0,0 +1,67 @@
+"""Tests for the binary format."""
+
+from array import array
+from datetime import datetime
+
+import pytest
+
+from bwt_api.binary import pack, pack_many, unpack, unpack_many
+from bwt_api.bwt_api import CurrentResponseView
+from bwt_api.data import DailyResponse, WifiResponse, YearlyResponse
+from bwt_api.error import BwtError
+from bwt_api.simulator import CURRENT_DATA, GATT
+from bwt_api.smart_dos_api import _SNAPSHOT_PARSERS
+
+
+def _current():
+    return CurrentResponseView(dict(CURRENT_DATA)).to_response()
+
+
+def test_current_round_trip():
+    response = _current()
+    assert unpack(pack(response)) == response
+    response.errors = [BwtError(88), BwtError(1), BwtError(100)]
+    response.regeneration_last_1 = datetime(1999, 12, 31, 23, 59, 59)
+    restored = unpack(pack(response))
+    assert restored.errors == [BwtError(1), BwtError(88), BwtError(100)]
+    assert restored.regeneration_last_1 == response.regeneration_last_1
+
+
+def test_other_version_rejected():
+    data = bytearray(pack(_current()))
+    data[4] = 1
+    with pytest.raises(ValueError, match="version 1"):
+        unpack(bytes(data))
+
+
+def test_smart_dos_round_trip():
+    for uuid, (_, parser) in _SNAPSHOT_PARSERS.items():
+        parsed = parser(GATT[uuid])
+        for response in parsed.values() if isinstance(parsed, dict) else [parsed]:
+            assert unpack(pack(response)) == response
+
+
+def test_batch():
+    responses = [DailyResponse(array("i", range(i, i + 48))) for i in range(100)]
+    data = pack_many(responses)
+    assert unpack_many(data) == responses
+    assert unpack_many(pack_many([YearlyResponse(array("i", range(12)))]))[0].values.tolist() == list(range(12))
+    with pytest.raises(ValueError):
+        unpack(data)
+    with pytest.raises(TypeError):
+        pack_many([responses[0], YearlyResponse(array("i", range(12)))])
+
+
+def test_invalid():
+    wifi = WifiResponse("x" * 33, -60, "-61", "2", True, None, None, None, None, None, None)
+    with pytest.raises(ValueError):
+        pack(wifi)
+    response = _current()
+    response.errors = [BwtError(127)]
+    with pytest.raises(ValueError):
+        pack(response)
+    data = pack(_current())
+    with pytest.raises(ValueError):
+        unpack(data[:4] + b"\x03" + data[5:])
+    with pytest.raises(ValueError):
+        unpack(data[:-1])
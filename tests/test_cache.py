@@ -0,0 +1,76 @@
+import asyncio
+
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtApi
+from bwt_api.cache import ResponseCache
+
+yearly_json = "{" + ",".join(f'"Month{m:02}_l": {m}' for m in range(1, 13)) + "}"
+
+
+async def test_yearly_cached():
+    cache = ResponseCache(ttl={"GetYearlyData": 3600})
+    with aioresponses() as mocked:
+        mocked.get("http://host:8080/api/GetYearlyData", status=200, body=yearly_json)
+        async with BwtApi("host", "code", cache=cache) as api:
+            first = await api.get_yearly_data()
+            second = await api.get_yearly_data()
+    assert first == second
+    assert cache.stats.misses == 1
+    assert cache.stats.hits == 1
+
+
+async def test_stale_while_revalidate():
+    cache = ResponseCache(default_ttl=0.01, stale_while_revalidate=True)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await cache.get_or_load("host", "x", load) == 1
+    await asyncio.sleep(0.02)
+    # Expired: the stale value comes back at once and a refresh runs in the background
+    assert await cache.get_or_load("host", "x", load) == 1
+    await asyncio.sleep(0)
+    assert await cache.get_or_load("host", "x", load) == 2
+    assert cache.stats.stale_hits == 1
+
+
+async def test_close_cancels_refresh():
+    cache = ResponseCache(default_ttl=0.01, stale_while_revalidate=True)
+    started = asyncio.Event()
+    cancelled = False
+
+    async def load():
+        nonlocal cancelled
+        if len(cache):
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+        return 1
+
+    await cache.get_or_load("host", "x", load)
+    await asyncio.sleep(0.02)
+    assert await cache.get_or_load("host", "x", load) == 1
+    await started.wait()
+    await cache.close()
+    assert cancelled
+    assert not cache._refreshing
+
+
+async def test_lru_bound():
+    cache = ResponseCache(default_ttl=60, max_entries=2)
+
+    async def load():
+        return 0
+
+    for host in ("a", "b", "c"):
+        await cache.get_or_load(host, "x", load)
+    assert len(cache) == 2
+    await cache.get_or_load("a", "x", load)
+    assert cache.stats.misses == 4
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtSilkApi
+from bwt_api.coalesce import RequestCoalescer
+from bwt_api.exception import ApiException
+
+
+async def test_concurrent_calls_share_request():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", status=200, body='{"params":[1,2]}')
+        async with BwtSilkApi("host") as api:
+            results = await asyncio.gather(api.get_registers(), api.get_registers())
+    assert results == [[1, 2], [1, 2]]
+
+
+async def test_shared_exception():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", status=500, body="Error")
+        async with BwtSilkApi("host") as api:
+            results = await asyncio.gather(api.get_registers(), api.get_registers(), return_exceptions=True)
+    assert all(isinstance(r, ApiException) for r in results)
+
+
+async def test_cancel_one_caller():
+    coalescer = RequestCoalescer()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(coalescer.run("key", load))
+    second = asyncio.create_task(coalescer.run("key", load))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == 42
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert len(coalescer) == 0
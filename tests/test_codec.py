@@ -0,0 +1,46 @@
+"""Tests for the sample stream codec."""
+
+import random
+
+import pytest
+
+from bwt_api.codec import EncodedSeries
+
+
+def test_round_trip():
+    rng = random.Random(1)
+    values = [261633]
+    for _ in range(5000):
+        values.append(values[-1] + rng.choice([0, 0, 0, 1, 2, 25]))
+    series = EncodedSeries.encode(values, block_size=256)
+    assert len(series) == len(values)
+    assert series.decode().tolist() == values
+    assert series.nbytes < len(values) * 8 // 4
+
+
+def test_random_access():
+    values = [(-1) ** i * i * i for i in range(1000)]
+    series = EncodedSeries.encode(values, block_size=100)
+    assert series[0] == values[0]
+    assert series[555] == values[555]
+    assert series[-1] == values[-1]
+    assert series.decode(95, 305).tolist() == values[95:305]
+    assert series.decode(990, 2000).tolist() == values[990:]
+    assert len(series.decode(10, 10)) == 0
+    with pytest.raises(IndexError):
+        series[1000]
+    with pytest.raises(ValueError):
+        series.decode(-5)
+    with pytest.raises(ValueError):
+        series.decode(0, -1)
+
+
+def test_bytes_and_append():
+    values = list(range(0, 3000, 3)) + [5, -7, 2 ** 40]
+    series = EncodedSeries.encode(values[:-2], block_size=64)
+    restored = EncodedSeries.from_bytes(series.to_bytes())
+    restored.extend(values[-2:])
+    assert restored.decode().tolist() == values
+    assert EncodedSeries.from_bytes(EncodedSeries().to_bytes()).decode().tolist() == []
+    with pytest.raises(ValueError):
+        EncodedSeries.from_bytes(b"XXXX" + bytes(16))
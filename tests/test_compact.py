@@ -0,0 +1,95 @@
+"""Tests for the compact response variants."""
+
+import dataclasses
+
+import pytest
+
+from bwt_api.bwt_api import CurrentResponseView
+from bwt_api.compact import (
+    _COMPACT_TYPES,
+    CompactConfigurationResponse,
+    CompactCurrentResponse,
+    CompactDeviceInfoResponse,
+    CompactWifiResponse,
+    compact,
+)
+from bwt_api.simulator import CURRENT_DATA, GATT
+from bwt_api.smart_dos_api import (
+    _parse_configuration,
+    _parse_device_info,
+    _parse_pouch_info,
+    _parse_remaining_capacity,
+    _parse_substance_dosage,
+    _parse_time_info,
+    _parse_treated_water,
+    _parse_wifi_info,
+)
+
+
+def _current():
+    return CurrentResponseView(dict(CURRENT_DATA)).to_response()
+
+
+def test_current_round_trip():
+    response = _current()
+    compacted = compact(response)
+    assert isinstance(compacted, CompactCurrentResponse)
+    assert compacted.errors == tuple(response.errors)
+    assert compacted.to_response() == response
+
+
+def test_frozen_slotted_hashable():
+    compacted = compact(_current())
+    assert not hasattr(compacted, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        compacted.current_flow = 1
+    assert hash(compacted) == hash(compact(_current()))
+    assert len({compacted, compact(_current())}) == 1
+
+
+def test_values_shared():
+    first = compact(_current())
+    second = compact(_current())
+    assert first.firmware_version is second.firmware_version
+    assert first.in_hardness is second.in_hardness
+    assert first.errors is second.errors
+    assert first.regeneration_last_1 is second.regeneration_last_1
+
+
+def test_smart_dos_round_trip():
+    wifi = _parse_wifi_info(GATT["0104"])
+    device_info = _parse_device_info(GATT["0201"])
+    configuration = _parse_configuration(GATT["0202"])
+    assert isinstance(compact(wifi), CompactWifiResponse)
+    assert compact(wifi).to_response() == wifi
+    assert isinstance(compact(device_info), CompactDeviceInfoResponse)
+    assert compact(device_info).to_response() == device_info
+    assert compact(device_info).product_code is compact(_parse_device_info(GATT["0201"])).product_code
+    assert isinstance(compact(configuration), CompactConfigurationResponse)
+    assert compact(configuration) is compact(_parse_configuration(GATT["0202"]))
+
+
+@pytest.mark.parametrize("response_type", list(_COMPACT_TYPES), ids=lambda t: t.__name__)
+def test_fields_match_response(response_type):
+    # The compact classes are written out by hand, a field added to data.py must be added there too
+    compact_type = _COMPACT_TYPES[response_type]
+    names = [field.name for field in dataclasses.fields(compact_type)]
+    assert names == [field.name for field in dataclasses.fields(response_type)]
+
+
+@pytest.mark.parametrize("response", [
+    _parse_time_info(GATT["0208"]),
+    _parse_pouch_info(GATT["0401"]),
+    _parse_remaining_capacity(GATT["0402"])[0],
+    _parse_treated_water(GATT["0503"])[0],
+    _parse_substance_dosage(GATT["0505"]),
+], ids=lambda response: type(response).__name__)
+def test_round_trip(response):
+    compacted = compact(response)
+    assert type(compacted) is _COMPACT_TYPES[type(response)]
+    assert compacted.to_response() == response
+
+
+def test_unknown_type():
+    with pytest.raises(TypeError):
+        compact(object())
@@ -0,0 +1,67 @@
+import asyncio
+from collections import Counter
+
+from aioresponses import aioresponses
+
+from bwt_api.bwt import BwtModel
+from bwt_api.coordinator import PollingCoordinator
+from bwt_api.fleet import FleetHost
+
+
+def test_plan():
+    hosts = [
+        FleetHost("perla", BwtModel.PERLA_LOCAL_API, code="code"),
+        FleetHost("dos", BwtModel.SMART_DOS, methods=("get_device_info",)),
+    ]
+    coordinator = PollingCoordinator(hosts, cadence={"GetCurrentData": 10, "GetYearlyData": 3600, "0201": 10, "0503": 60})
+    assert [(h.host, e) for h, e, _ in coordinator.plan()] == [
+        ("perla", "GetCurrentData"),
+        ("perla", "GetYearlyData"),
+        ("dos", "0201"),
+    ]
+
+
+async def test_cadence_respected():
+    hosts = [FleetHost("a", BwtModel.PERLA_SILK), FleetHost("b", BwtModel.PERLA_SILK)]
+    calls = Counter()
+    with aioresponses() as mocked:
+        mocked.get("http://a:80/silk/registers", status=200, body='{"params":[1]}', repeat=True)
+        mocked.get("http://b:80/silk/registers", status=500, body="Error", repeat=True)
+        async with PollingCoordinator(hosts, cadence={"registers": 0.05}, start_spread=0.01) as coordinator:
+            coordinator.subscribe(lambda result: calls.update([(result.host, result.ok)]))
+            task = asyncio.create_task(coordinator.run())
+            await asyncio.sleep(0.13)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    assert 2 <= calls[("a", True)] <= 3
+    assert 2 <= calls[("b", False)] <= 3
+
+
+async def test_slow_calls_do_not_pile_up():
+    class SlowApi:
+        active = 0
+        max_active = 0
+        calls = 0
+
+        async def get_registers(self):
+            SlowApi.active += 1
+            SlowApi.max_active = max(SlowApi.max_active, SlowApi.active)
+            SlowApi.calls += 1
+            try:
+                await asyncio.sleep(0.05)
+            finally:
+                SlowApi.active -= 1
+            return [1]
+
+    hosts = [FleetHost("slow", BwtModel.PERLA_SILK)]
+    results = []
+    async with PollingCoordinator(hosts, cadence={"registers": 0.01}, start_spread=0, per_host=4) as coordinator:
+        coordinator._api = lambda host: SlowApi()
+        coordinator.subscribe(results.append)
+        task = asyncio.create_task(coordinator.run())
+        await asyncio.sleep(0.22)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    assert SlowApi.max_active == 1
+    assert 3 <= SlowApi.calls <= 5
+    assert len(results) >= 3
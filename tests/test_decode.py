@@ -0,0 +1,40 @@
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtSilkApi
+from bwt_api.decode import default_decoder, msgspec_decoder, orjson_decoder, stdlib_decoder
+from bwt_api.exception import ApiException
+
+BODY = b'{"params":[0,-1,18],"name":"\\u00e4","ok":true,"x":null}'
+
+
+def available_decoders():
+    decoders = [stdlib_decoder()]
+    for factory in (orjson_decoder, msgspec_decoder):
+        try:
+            decoders.append(factory())
+        except ImportError:
+            pass
+    return decoders
+
+
+@pytest.mark.parametrize("decoder", available_decoders())
+def test_decoders_agree(decoder):
+    assert decoder(BODY) == {"params": [0, -1, 18], "name": "ä", "ok": True, "x": None}
+    with pytest.raises(ValueError):
+        decoder(b"not json")
+
+
+async def test_custom_decoder():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", status=200, body="ignored")
+        async with BwtSilkApi("host", decoder=lambda body: {"params": [len(body)]}) as api:
+            assert await api.get_registers() == [7]
+
+
+async def test_invalid_json():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", status=200, body="not json")
+        async with BwtSilkApi("host", decoder=default_decoder()) as api:
+            with pytest.raises(ApiException):
+                await api.get_registers()
@@ -3,7 +3,7 @@ from zoneinfo import ZoneInfo
 import pytest
 
 from bwt_api.api import BwtApi, treated_to_blended
-from bwt_api.bwt import BwtModel, determine_bwt_model
+from bwt_api.bwt import BwtModel, ModelCache, determine_bwt_model
 from bwt_api.error import BwtError
 from bwt_api.data import CurrentResponse, Hardness, BwtStatus
 
@@ -62,3 +62,55 @@ async def test_silk():
         mocked.get("http://host:80/silk/registers", status=200, body=silk_json)
         result = await determine_bwt_model("host")
         assert result == BwtModel.PERLA_SILK
+
+async def test_smart_dos():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/api/v1/gatt/0201", status=200, body='{"fwRev":"1.1.0+4"}')
+        result = await determine_bwt_model("host")
+        assert result == BwtModel.SMART_DOS
+
+async def test_unreachable():
+    with aioresponses():
+        with pytest.raises(ConnectException):
+            await determine_bwt_model("host")
+
+async def test_cache(tmp_path):
+    path = str(tmp_path / "models.json")
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/api/v1/gatt/0201", status=200, body='{"fwRev":"1.1.0+4"}')
+        cache = ModelCache(path)
+        result = await determine_bwt_model("host", cache=cache)
+        assert result == BwtModel.SMART_DOS
+        await cache.flush()
+
+    # A new cache instance reads the file and does not probe again
+    cache = ModelCache(path)
+    assert cache.get("host").firmware == "1.1.0+4"
+    with aioresponses():
+        result = await determine_bwt_model("host", cache=cache)
+        assert result == BwtModel.SMART_DOS
+
+    assert ModelCache(path, max_age=-1).get("host") is None
+
+
+async def test_cache_batches_writes(tmp_path, monkeypatch):
+    path = str(tmp_path / "models.json")
+    cache = ModelCache(path)
+    writes = []
+    write = cache._write
+    monkeypatch.setattr(cache, "_write", lambda raw: (writes.append(raw), write(raw)))
+    cache.put("a", BwtModel.PERLA_SILK)
+    cache.put("b", BwtModel.SMART_DOS, "1.1.0")
+    cache.remove("a")
+    assert not writes
+    await cache.flush()
+    assert len(writes) == 1
+    assert ModelCache(path).get("a") is None
+    assert ModelCache(path).get("b").firmware == "1.1.0"
+    assert not (tmp_path / "models.json.tmp").exists()
+
+
+def test_cache_without_event_loop(tmp_path):
+    path = str(tmp_path / "models.json")
+    ModelCache(path).put("host", BwtModel.PERLA_LOCAL_API)
+    assert ModelCache(path).get("host").model == BwtModel.PERLA_LOCAL_API
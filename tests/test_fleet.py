@@ -0,0 +1,103 @@
+import asyncio
+
+from aioresponses import CallbackResult, aioresponses
+
+from bwt_api.api import FleetHost, FleetPoller
+from bwt_api.error import BwtError, ErrorEvent, error_mask
+from bwt_api.fleet import FleetErrors
+from bwt_api.bwt import BwtModel
+from bwt_api.cache import ResponseCache
+from bwt_api.exception import CircuitOpenException, WrongCodeException
+from bwt_api.retry import CircuitBreaker
+
+silk_json = """{"params":[0,-1,18,23]}"""
+
+
+async def test_poll_mixed_fleet():
+    hosts = [
+        FleetHost("perla", BwtModel.PERLA_LOCAL_API, code="wrong"),
+        FleetHost("silk", BwtModel.PERLA_SILK),
+        FleetHost("nocode", BwtModel.PERLA_LOCAL_API),
+    ]
+    with aioresponses() as mocked:
+        mocked.get("http://perla:8080/api/GetCurrentData", status=404, body="")
+        mocked.get("http://silk:80/silk/registers", status=200, body=silk_json)
+        async with FleetPoller(hosts, concurrency=2) as poller:
+            results = {r.host: r async for r in poller.poll()}
+
+    assert isinstance(results["perla"].error, WrongCodeException)
+    assert results["silk"].ok
+    assert results["silk"].value == [0, -1, 18, 23]
+    assert isinstance(results["nocode"].error, ValueError)
+
+
+async def test_poll_custom_methods():
+    hosts = [FleetHost("silk", BwtModel.PERLA_SILK, methods=("get_registers", "get_registers"))]
+    with aioresponses() as mocked:
+        mocked.get("http://silk:80/silk/registers", status=200, body=silk_json, repeat=True)
+        async with FleetPoller(hosts) as poller:
+            results = [r async for r in poller.poll()]
+
+    assert [r.method for r in results] == ["get_registers", "get_registers"]
+    assert all(r.ok for r in results)
+
+
+async def test_slow_host_does_not_block_others():
+    async def slow(url, **kwargs):
+        await asyncio.sleep(0.05)
+        return CallbackResult(status=200, body=silk_json)
+
+    hosts = [
+        FleetHost("slow", BwtModel.PERLA_SILK, methods=("get_registers",) * 3),
+        FleetHost("fast1", BwtModel.PERLA_SILK),
+        FleetHost("fast2", BwtModel.PERLA_SILK),
+    ]
+    with aioresponses() as mocked:
+        mocked.get("http://slow:80/silk/registers", callback=slow, repeat=True)
+        mocked.get("http://fast1:80/silk/registers", status=200, body=silk_json)
+        mocked.get("http://fast2:80/silk/registers", status=200, body=silk_json)
+        async with FleetPoller(hosts, concurrency=3, per_host=1) as poller:
+            results = [r.host async for r in poller.poll()]
+
+    # The calls queued for the slow host must not hold the global slots
+    assert sorted(results[:2]) == ["fast1", "fast2"]
+    assert results[2:] == ["slow"] * 3
+
+
+async def test_api_kwargs_per_host():
+    hosts = [FleetHost("down", BwtModel.PERLA_SILK), FleetHost("up", BwtModel.PERLA_SILK)]
+    cache = ResponseCache(ttl={"registers": 60})
+    breakers = {}
+
+    def api_kwargs(host):
+        breakers[host.host] = CircuitBreaker(failure_threshold=1, cooldown=60)
+        return {"cache": cache, "circuit_breaker": breakers[host.host]}
+
+    with aioresponses() as mocked:
+        mocked.get("http://down:80/silk/registers", exception=TimeoutError(), repeat=True)
+        mocked.get("http://up:80/silk/registers", status=200, body=silk_json)
+        async with FleetPoller(hosts, api_kwargs=api_kwargs) as poller:
+            first = {r.host: r async for r in poller.poll()}
+            second = {r.host: r async for r in poller.poll()}
+
+    assert list(breakers) == ["down", "up"]
+    assert not isinstance(first["down"].error, CircuitOpenException)
+    assert isinstance(second["down"].error, CircuitOpenException)
+    # Served from the shared cache, the mock answers only once
+    assert second["up"].value == first["up"].value == [0, -1, 18, 23]
+    assert cache.stats.hits == 1
+
+
+def test_fleet_errors():
+    errors = FleetErrors()
+    assert errors.update("a", error_mask([BwtError.REGENERATIV_0])) == [ErrorEvent(BwtError.REGENERATIV_0, True)]
+    errors.update("b", error_mask([BwtError.REGENERATIV_0, BwtError.REGENERATIV_20]))
+    errors.update("c", error_mask([BwtError.REGENERATIV_20]))
+    assert errors.count(BwtError.REGENERATIV_0) == 2
+    assert errors.hosts(BwtError.REGENERATIV_20) == ["b", "c"]
+    assert errors.fatal_count() == 2
+
+    assert errors.update("a", 0) == [ErrorEvent(BwtError.REGENERATIV_0, False)]
+    assert errors.hosts(BwtError.REGENERATIV_0) == ["b"]
+    assert errors.fatal_count() == 1
+    assert errors.count(BwtError.DOSING_FAULT) == 0
@@ -0,0 +1,77 @@
+"""Allocation budgets of the decode paths, to catch leaks in long running pollers."""
+
+import gc
+import tracemalloc
+
+import pytest
+
+from bwt_api.api import BwtApi, BwtSilkApi, BwtSmartDosApi
+from bwt_api.testing import StaticSession
+from bwt_api.simulator import CURRENT_DATA, GATT, SILK_REGISTERS
+
+CYCLES = 1000
+
+
+SESSION = StaticSession({
+    "api/GetCurrentData": CURRENT_DATA,
+    "silk/registers": {"params": SILK_REGISTERS},
+    **{f"api/v1/gatt/{uuid}": value for uuid, value in GATT.items()},
+})
+
+
+def apis():
+    return {
+        "current_data": BwtApi("host", "code", session=SESSION).get_current_data,
+        "registers": BwtSilkApi("host", session=SESSION).get_registers,
+        "snapshot": BwtSmartDosApi("host", session=SESSION).get_snapshot,
+    }
+
+
+# Upper bounds of the peak memory of a single call in bytes
+CALL_BUDGETS = {
+    "current_data": 48 * 1024,
+    "registers": 16 * 1024,
+    "snapshot": 96 * 1024,
+}
+
+
+def retained():
+    """Bytes and number of blocks still allocated after a full collection."""
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    stats = snapshot.statistics("filename")
+    return sum(stat.size for stat in stats), sum(stat.count for stat in stats)
+
+
+@pytest.fixture
+def traced():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+@pytest.mark.parametrize("name", list(CALL_BUDGETS))
+async def test_call_allocation_budget(name, traced):
+    call = apis()[name]
+    for _ in range(50):
+        await call()
+    gc.collect()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    await call()
+    _, peak = tracemalloc.get_traced_memory()
+    assert peak - before < CALL_BUDGETS[name]
+
+
+@pytest.mark.parametrize("name", list(CALL_BUDGETS))
+async def test_retained_memory_flat(name, traced):
+    call = apis()[name]
+    for _ in range(200):
+        await call()
+    size_before, blocks_before = retained()
+    for _ in range(CYCLES):
+        await call()
+    size_after, blocks_after = retained()
+    # Anything kept per call would add at least CYCLES blocks
+    assert blocks_after - blocks_before < CYCLES // 4
+    assert size_after - size_before < 32 * 1024
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+from aioresponses import aioresponses
+from multidict import CIMultiDict
+
+import aiohttp
+
+from bwt_api.api import BwtApi, BwtSilkApi
+from bwt_api.exception import ConnectException, WrongCodeException
+from bwt_api.recording import Record, RecordingSession, ReplaySession, read_records
+
+
+async def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "fleet.rec")
+    with aioresponses() as mocked:
+        mocked.get("http://silk:80/silk/registers", status=200, body='{"params":[1,2]}')
+        mocked.get("http://silk:80/silk/registers", status=200, body='{"params":[3,4]}')
+        mocked.get("http://perla:8080/api/GetCurrentData", status=404, body="")
+        async with aiohttp.ClientSession() as session:
+            recorder = RecordingSession(session, path)
+            async with BwtSilkApi("silk", session=recorder) as api:
+                assert await api.get_registers() == [1, 2]
+                assert await api.get_registers() == [3, 4]
+            async with BwtApi("perla", "code", session=recorder) as api:
+                with pytest.raises(WrongCodeException):
+                    await api.get_current_data()
+            await recorder.close()
+
+    records = list(read_records(path))
+    assert [(r.url, r.status) for r in records] == [
+        ("http://silk:80/silk/registers", 200),
+        ("http://silk:80/silk/registers", 200),
+        ("http://perla:8080/api/GetCurrentData", 404),
+    ]
+
+    replay = ReplaySession(path)
+    async with BwtSilkApi("silk", session=replay) as api:
+        assert [await api.get_registers() for _ in range(3)] == [[1, 2], [3, 4], [1, 2]]
+    async with BwtApi("perla", "code", session=replay) as api:
+        with pytest.raises(WrongCodeException):
+            await api.get_current_data()
+    async with BwtSilkApi("other", session=replay) as api:
+        with pytest.raises(ConnectException):
+            await api.get_registers()
+
+
+async def test_multi_valued_headers(tmp_path):
+    path = str(tmp_path / "cookies.rec")
+    headers = CIMultiDict([("Content-Type", "application/json"), ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2")])
+    with aioresponses() as mocked:
+        mocked.get("http://silk:80/silk/registers", status=200, body='{"params":[1]}', headers=headers)
+        async with aiohttp.ClientSession() as session:
+            recorder = RecordingSession(session, path)
+            async with recorder.get("http://silk:80/silk/registers") as response:
+                assert response.headers.getall("set-cookie") == ["a=1", "b=2"]
+            await recorder.close()
+
+    assert list(read_records(path))[0].headers[-2:] == [("Set-Cookie", "a=1"), ("Set-Cookie", "b=2")]
+    async with ReplaySession(path).get("http://silk:80/silk/registers") as response:
+        assert response.headers.getall("set-cookie") == ["a=1", "b=2"]
+        assert response.headers["content-type"] == "application/json"
+
+
+async def test_records_written_off_the_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "batch.rec")
+    recorder = RecordingSession(None, path)
+    writes = []
+    write = recorder._write
+    monkeypatch.setattr(recorder, "_write", lambda data: (writes.append(threading.get_ident()), write(data)))
+    for index in range(3):
+        recorder.record(Record(float(index), "http://silk:80/silk/registers", 200, [], b"{}", 0.1))
+    assert not writes
+    await recorder.close()
+    assert writes and threading.get_ident() not in writes
+    assert len(writes) == 1
+    assert [r.timestamp for r in read_records(path)] == [0, 1, 2]
+
+
+def test_partial_record_skipped(tmp_path):
+    path = tmp_path / "crash.rec"
+    path.write_bytes(b"BWTREC1\n" + b"\x00" * 10)
+    assert list(read_records(str(path))) == []
@@ -0,0 +1,57 @@
+"""Tests for the Silk register decoder."""
+
+import math
+
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api import registers
+from bwt_api.api import BwtSilkApi
+from bwt_api.registers import Register, SilkDecoder
+from bwt_api.simulator import SILK_REGISTERS
+
+DECODER = SilkDecoder({
+    2: Register("hardness_in", unit="dH"),
+    4: Register("capacity", 0.5, "l"),
+    36: Register("unused"),
+    40: Register("flag", sentinel=None),
+})
+
+
+def test_decode():
+    response = DECODER.decode(SILK_REGISTERS)
+    assert response.values == {"hardness_in": 18, "capacity": 142.5, "unused": None, "flag": 1}
+    assert response.units["capacity"] == "l"
+    with pytest.raises(TypeError):
+        response.units["capacity"] = "ml"
+    assert DECODER.decode(SILK_REGISTERS).units["capacity"] == "l"
+    assert DECODER.decode(SILK_REGISTERS[:10])["flag"] is None
+    with pytest.raises(ValueError):
+        SilkDecoder({1: Register("x"), 2: Register("x")})
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_decode_batch(monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(registers, "np", None)
+    vectors = [SILK_REGISTERS, [value + 1 for value in SILK_REGISTERS]]
+    columns = DECODER.decode_batch(vectors)
+    assert columns["hardness_in"].tolist() == [18, 19]
+    assert columns["capacity"].tolist() == [142.5, 143]
+    assert math.isnan(columns["unused"][0]) and columns["unused"][1] == 0
+    assert columns["flag"].tolist() == [1, 2]
+    assert len(DECODER.decode_batch([])["capacity"]) == 0
+    with pytest.raises(ValueError):
+        DECODER.decode_batch([SILK_REGISTERS[:10]])
+
+
+async def test_get_decoded_registers():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", status=200, payload={"params": SILK_REGISTERS})
+        async with BwtSilkApi("host") as api:
+            response = await api.get_decoded_registers()
+    assert response["register_02"] == 18
+    # The default map keeps -1, only maps with known registers treat it as not available
+    assert response["register_01"] == -1
@@ -0,0 +1,59 @@
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtSmartDosApi
+from bwt_api.exception import ApiException, CircuitOpenException, ConnectException
+from bwt_api.retry import CircuitBreaker, CircuitState, RetryPolicy, call_with_retry
+
+
+async def test_retry_until_success():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/api/v1/gatt/0505", exception=TimeoutError())
+        mocked.get("http://host:80/api/v1/gatt/0505", status=200, body='{"dosedMineral":1.5}')
+        async with BwtSmartDosApi("host", retry=RetryPolicy(base_delay=0)) as api:
+            result = await api.get_substance_dosage()
+    assert result.dosed_mineral == 1.5
+
+
+async def test_no_retry_for_api_errors():
+    attempts = 0
+
+    async def load():
+        nonlocal attempts
+        attempts += 1
+        raise ApiException("bad")
+
+    with pytest.raises(ApiException):
+        await call_with_retry(load, RetryPolicy(base_delay=0))
+    assert attempts == 1
+
+
+async def test_circuit_breaker(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr("bwt_api.retry.time.monotonic", lambda: now)
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10)
+
+    async def fail():
+        raise ConnectException
+
+    async def succeed():
+        return 1
+
+    for _ in range(2):
+        with pytest.raises(ConnectException):
+            await call_with_retry(fail, breaker=breaker)
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenException) as info:
+        await call_with_retry(succeed, breaker=breaker)
+    assert info.value.retry_after == 10
+
+    # After the cooldown a single trial request closes the circuit again
+    now += 10
+    assert await call_with_retry(succeed, breaker=breaker) == 1
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_delay_bounds():
+    policy = RetryPolicy(base_delay=1, max_delay=4, jitter=0)
+    assert [policy.delay(a) for a in range(1, 5)] == [1, 2, 4, 4]
+    assert 0 <= RetryPolicy(base_delay=1).delay(3) <= 4
@@ -0,0 +1,52 @@
+import asyncio
+
+from bwt_api.scheduler import HostScheduler, Priority
+
+
+async def test_priority_order():
+    scheduler = HostScheduler(max_in_flight=1)
+    order = []
+    release = asyncio.Event()
+
+    async def request(endpoint):
+        async with scheduler.slot(endpoint):
+            order.append(endpoint)
+            await release.wait()
+
+    first = asyncio.create_task(request("GetDailyData"))
+    await asyncio.sleep(0)
+    others = [asyncio.create_task(request(e)) for e in ("GetYearlyData", "GetMonthlyData", "GetCurrentData")]
+    await asyncio.sleep(0)
+    assert scheduler.in_flight == 1
+    assert scheduler.waiting == 3
+    release.set()
+    await asyncio.gather(first, *others)
+    assert order == ["GetDailyData", "GetCurrentData", "GetYearlyData", "GetMonthlyData"]
+
+
+async def test_rate_limit():
+    scheduler = HostScheduler(max_in_flight=4, rate=100, burst=1)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(4):
+        async with scheduler.slot("x", Priority.NORMAL):
+            pass
+    # One token up front, three more at 100 per second
+    assert loop.time() - start >= 0.025
+
+
+async def test_cancelled_waiter():
+    scheduler = HostScheduler(max_in_flight=1)
+
+    async def request():
+        async with scheduler.slot("GetYearlyData"):
+            pass
+
+    async with scheduler.slot("GetCurrentData"):
+        waiter = asyncio.create_task(request())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+    assert scheduler.in_flight == 0
+    async with scheduler.slot("GetCurrentData"):
+        assert scheduler.in_flight == 1
@@ -0,0 +1,104 @@
+"""Tests for the series helpers."""
+
+from array import array
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtApi, treated_to_blended, treated_to_blended_batch
+from bwt_api.data import Hardness
+from bwt_api import series
+from bwt_api.series import SeriesMatrix, as_numpy, cumulative, daily_timestamps, hourly
+from bwt_api.simulator import DAILY_DATA, MONTHLY_DATA
+
+
+async def test_series_are_arrays():
+    with aioresponses() as mocked:
+        mocked.get("http://host:8080/api/GetDailyData", status=200, payload=DAILY_DATA)
+        mocked.get("http://host:8080/api/GetMonthlyData", status=200, payload=MONTHLY_DATA)
+        async with BwtApi("host", "code") as api:
+            daily = await api.get_daily_data()
+            monthly = await api.get_monthly_data()
+    assert daily.values == array("i", DAILY_DATA.values())
+    assert monthly.values.tolist() == list(MONTHLY_DATA.values())
+
+
+def test_cumulative_and_hourly():
+    values = array("i", range(48))
+    assert cumulative(values)[-1] == sum(range(48))
+    assert hourly(values).tolist() == [4 * hour + 1 for hour in range(24)]
+    with pytest.raises(ValueError):
+        hourly(values[:47])
+
+
+def test_daily_timestamps():
+    stamps = daily_timestamps(date(2024, 1, 2), timezone.utc)
+    assert len(stamps) == 48
+    assert stamps[0] == 1704153600
+    assert stamps[1] - stamps[0] == 1800
+
+
+def test_stack():
+    matrix = SeriesMatrix.stack([array("i", [1, 2, 3]), [4, 5, 6], array("q", [7, 8, 9])])
+    assert (matrix.rows, matrix.columns) == (3, 3)
+    assert matrix.row(1).tolist() == [4, 5, 6]
+    assert matrix.column_sums().tolist() == [12, 15, 18]
+    with pytest.raises(ValueError):
+        SeriesMatrix.stack([[1, 2], [1]])
+
+
+def test_numpy_views():
+    np = pytest.importorskip("numpy")
+    values = array("i", [1, 2, 3, 4])
+    view = as_numpy(values)
+    values[0] = 10
+    assert view[0] == 10
+    matrix = SeriesMatrix.stack([[1, 2], [3, 4]])
+    assert np.array_equal(matrix.to_numpy().sum(axis=0), [4, 6])
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_treated_to_blended_batch(monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(series, "np", None)
+    hin = [Hardness(374, 21, 37, 4), Hardness(0, 0, 0, 0), Hardness(374, 21, 37, 4)]
+    hout = [Hardness(71, 4, 7, 1), Hardness(0, 0, 0, 0), Hardness(374, 21, 37, 4)]
+    treated = [[306, 191, 0], [100, 200, 300], [100, 200, 300]]
+    blended = treated_to_blended_batch(treated, hin, hout)
+    for device in range(3):
+        expected = [treated_to_blended(t, hin[device].dH, hout[device].dH) for t in treated[device]]
+        assert blended.row(device).tolist() == pytest.approx(expected)
+    assert blended.values.typecode == "d"
+    fh = treated_to_blended_batch(treated, hin[0], hout[0], unit="fH")
+    assert fh.row(2)[0] == pytest.approx(treated_to_blended(100, 37, 7))
+    with pytest.raises(ValueError):
+        treated_to_blended_batch(treated, hin[:2], hout)
+
+
+def test_daily_timestamps_dst():
+    berlin = ZoneInfo("Europe/Berlin")
+    spring = daily_timestamps(date(2024, 3, 31), berlin)
+    # 02:00 and 02:30 do not exist, they start with 03:00
+    assert spring[4] == datetime(2024, 3, 31, 1, 30, tzinfo=berlin).timestamp() + 1800
+    assert spring[4] == spring[5] == spring[6] == datetime(2024, 3, 31, 3, 0, tzinfo=berlin).timestamp()
+    assert spring[7] - spring[6] == 1800
+    autumn = daily_timestamps(date(2024, 10, 27), berlin)
+    assert autumn[6] == datetime(2024, 10, 27, 3, 0, tzinfo=berlin).timestamp()
+    assert autumn[6] - autumn[5] == 5400
+    for stamps in (spring, autumn):
+        assert all(a <= b for a, b in zip(stamps, stamps[1:]))
+        assert datetime.fromtimestamp(stamps[-1], berlin).time() == time(23, 30)
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_column_sums(monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(series, "np", None)
+    matrix = SeriesMatrix.stack([[1, 2, 3], [4, 5, 6], [2 ** 30, 2 ** 30, 0]])
+    assert matrix.column_sums().tolist() == [2 ** 30 + 5, 2 ** 30 + 7, 9]
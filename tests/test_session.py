@@ -0,0 +1,55 @@
+"""Tests for the shared connection pool."""
+
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtApi, BwtSilkApi
+from bwt_api.session import close_shared_session, create_connector, shared_session
+
+
+async def test_create_connector():
+    connector = create_connector(limit=10, limit_per_host=1)
+    try:
+        assert connector.limit == 10
+        assert connector.limit_per_host == 1
+    finally:
+        await connector.close()
+
+
+async def test_shared_session_reused_and_recreated():
+    session = shared_session()
+    try:
+        assert shared_session() is session
+        with aioresponses() as mocked:
+            mocked.get("http://silk:80/silk/registers", status=200, body='{"params":[1]}')
+            async with BwtApi("perla", "code", session=shared_session()) as perla:
+                async with BwtSilkApi("silk", session=shared_session()) as silk:
+                    assert perla._session is silk._session is session
+                    assert await silk.get_registers() == [1]
+        # The api objects do not close the shared session
+        assert not session.closed
+    finally:
+        await close_shared_session()
+    assert session.closed
+
+    recreated = shared_session()
+    try:
+        assert recreated is not session
+        assert not recreated.closed
+    finally:
+        await close_shared_session()
+    # Nothing left to close
+    await close_shared_session()
+
+
+async def test_passed_connector_used_and_not_closed():
+    connector = create_connector()
+    try:
+        with aioresponses() as mocked:
+            mocked.get("http://silk:80/silk/registers", status=200, body='{"params":[1]}')
+            async with BwtSilkApi("silk", connector=connector) as api:
+                assert api._session.connector is connector
+                assert await api.get_registers() == [1]
+            assert api._session.closed
+        assert not connector.closed
+    finally:
+        await connector.close()
@@ -0,0 +1,33 @@
+import pytest
+
+from bwt_api.api import BwtApi, BwtSilkApi, BwtSmartDosApi
+from bwt_api.bwt import BwtModel, determine_bwt_model
+from bwt_api.exception import ApiException, ConnectException, WrongCodeException
+from bwt_api.simulator import DeviceSimulator, SimulatedDevice
+
+
+async def test_simulated_fleet():
+    async with DeviceSimulator() as sim:
+        sim.add("perla.sim", SimulatedDevice(BwtModel.PERLA_LOCAL_API, code="1234"))
+        sim.add("silk.sim", SimulatedDevice(BwtModel.PERLA_SILK))
+        dos = sim.add("dos.sim", SimulatedDevice(BwtModel.SMART_DOS))
+        async with sim.session() as session:
+            async with BwtApi("perla.sim", "1234", session=session) as api:
+                assert (await api.get_current_data()).treated_year == 80700
+                assert len((await api.get_daily_data()).values) == 48
+            async with BwtApi("perla.sim", "wrong", session=session) as api:
+                with pytest.raises(WrongCodeException):
+                    await api.get_current_data()
+            async with BwtSilkApi("silk.sim", session=session) as api:
+                assert (await api.get_registers())[:3] == [0, -1, 18]
+            async with BwtSmartDosApi("dos.sim", session=session) as api:
+                snapshot = await api.get_snapshot()
+                assert snapshot.errors == {}
+                dos.error_rate = 1
+                with pytest.raises(ApiException):
+                    await api.get_device_info()
+            async with BwtSilkApi("unknown.sim", session=session) as api:
+                with pytest.raises(ConnectException):
+                    await api.get_registers()
+            for host, model in (("perla.sim", BwtModel.PERLA_LOCAL_API), ("silk.sim", BwtModel.PERLA_SILK)):
+                assert await determine_bwt_model(host, session=session) == model
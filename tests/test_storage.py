@@ -0,0 +1,98 @@
+"""Tests for the columnar storage."""
+
+import os
+import struct
+import time
+from array import array
+from datetime import datetime, timezone
+
+import pytest
+
+from bwt_api.binary import _pack_datetime
+from bwt_api.bwt_api import CurrentResponseView
+from bwt_api.data import DailyResponse, TreatedWaterResponse
+from bwt_api.simulator import CURRENT_DATA
+from bwt_api.storage import CURRENT_SCHEMA, DAILY_SCHEMA, TREATED_WATER_SCHEMA, ColumnStore, Schema
+
+
+def test_append_and_range(tmp_path):
+    current = CurrentResponseView(dict(CURRENT_DATA)).to_response()
+    with ColumnStore(str(tmp_path), CURRENT_SCHEMA, capacity=2) as store:
+        for second in range(10):
+            store.append(second, current)
+        assert len(store) == 10
+        columns = store.range(3, 6)
+        assert columns["timestamp"].tolist() == [3.0, 4.0, 5.0]
+        assert columns["blended_total"].tolist() == [current.blended_total] * 3
+        assert columns["treated_year"].tolist() == [current.treated_year] * 3
+        assert len(store.range(20)["current_flow"]) == 0
+        with pytest.raises(ValueError):
+            store.append(5, current)
+
+
+def test_datetimes_independent_of_timezone(tmp_path, monkeypatch):
+    current = CurrentResponseView(dict(CURRENT_DATA)).to_response()
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        with ColumnStore(str(tmp_path), CURRENT_SCHEMA) as store:
+            store.append(0, current)
+            stored = store.range()["regeneration_last_1"][0]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    # The same epoch as in the binary format
+    assert stored == _pack_datetime(current.regeneration_last_1)
+    assert datetime.fromtimestamp(stored, timezone.utc).replace(tzinfo=None) == current.regeneration_last_1
+
+
+def test_sample_does_not_fit(tmp_path):
+    with ColumnStore(str(tmp_path), TREATED_WATER_SCHEMA) as store:
+        with pytest.raises(ValueError):
+            store.append(1, TreatedWaterResponse(2 ** 64, 1))
+        assert len(store) == 0
+        store.append(1, TreatedWaterResponse(100, 1))
+        assert store.range()["total_flow"].tolist() == [100]
+    short = Schema(TREATED_WATER_SCHEMA.columns, lambda response: (response.total_flow,))
+    with ColumnStore(str(tmp_path), short) as store:
+        with pytest.raises(ValueError):
+            store.append(2, TreatedWaterResponse(200, 2))
+        assert len(store) == 1
+
+
+def test_reopen_and_crash_recovery(tmp_path):
+    with ColumnStore(str(tmp_path), TREATED_WATER_SCHEMA) as store:
+        store.append(1, TreatedWaterResponse(100, 1))
+        store.append(2, TreatedWaterResponse(200, 2))
+    # Values of a third sample were written, but the count was not updated
+    with open(tmp_path / "total_flow.col", "r+b") as f:
+        f.seek(16)
+        f.write(struct.pack("=q", 300))
+    with ColumnStore(str(tmp_path), TREATED_WATER_SCHEMA) as store:
+        assert len(store) == 2
+        assert store.range()["total_flow"].tolist() == [100, 200]
+        store.append(3, TreatedWaterResponse(400, 4))
+        assert store.range(3)["total_flow"].tolist() == [400]
+
+
+def test_truncated_column(tmp_path):
+    with ColumnStore(str(tmp_path), TREATED_WATER_SCHEMA, capacity=2) as store:
+        store.append(1, TreatedWaterResponse(100, 1))
+        store.append(2, TreatedWaterResponse(200, 2))
+    os.truncate(tmp_path / "total_ticks.col", 8)
+    with ColumnStore(str(tmp_path), TREATED_WATER_SCHEMA) as store:
+        assert store.range()["total_ticks"].tolist() == [1]
+
+
+def test_daily_width(tmp_path):
+    with ColumnStore(str(tmp_path), DAILY_SCHEMA) as store:
+        store.append(0, DailyResponse(array("i", range(48))))
+        store.append(86400, DailyResponse(array("i", range(48, 96))))
+        values = store.range(86400)["values"]
+        assert values.tolist() == list(range(48, 96))
+
+
+def test_schema_mismatch(tmp_path):
+    ColumnStore(str(tmp_path), DAILY_SCHEMA).close()
+    with pytest.raises(ValueError):
+        ColumnStore(str(tmp_path), TREATED_WATER_SCHEMA)
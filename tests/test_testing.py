@@ -0,0 +1,14 @@
+import pytest
+
+from bwt_api.api import BwtApi, BwtSilkApi
+from bwt_api.exception import ApiException
+from bwt_api.testing import StaticSession
+
+
+async def test_static_session():
+    session = StaticSession({"silk/registers": {"params": [1, 2]}})
+    async with BwtSilkApi("host", session=session) as api:
+        assert await api.get_registers() == [1, 2]
+    async with BwtApi("host", "code", session=session) as api:
+        with pytest.raises(ApiException):
+            await api.get_current_data()
@@ -0,0 +1,49 @@
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtApi, BwtSilkApi
+from bwt_api.exception import ConnectException, DeadlineExceededException
+from bwt_api.timeout import Timeouts, current_timeouts, deadline
+
+
+async def test_connect_budget_exceeded():
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", exception=aiohttp.ConnectionTimeoutError())
+        async with BwtSilkApi("host", timeouts=Timeouts(connect=1)) as api:
+            with pytest.raises(DeadlineExceededException) as info:
+                await api.get_registers()
+    assert info.value.phase == "connect"
+    assert info.value.budget == 1
+    assert isinstance(info.value, ConnectException)
+
+
+async def test_per_call_deadline():
+    with aioresponses() as mocked:
+        mocked.get("http://host:8080/api/GetCurrentData", exception=TimeoutError())
+        async with BwtApi("host", "code") as api:
+            with deadline(total=0.5):
+                with pytest.raises(DeadlineExceededException) as info:
+                    await api.get_current_data()
+            call = next(iter(mocked.requests.values()))[0]
+    assert info.value.phase == "total"
+    assert info.value.budget == 0.5
+    assert call.kwargs["timeout"].total == 0.5
+
+
+def test_client_timeout():
+    timeout = Timeouts(connect=1, read=2, total=3).client_timeout()
+    # Waiting for a free pooled connection is not a connect failure of the device
+    assert timeout.connect is None
+    assert (timeout.sock_connect, timeout.sock_read, timeout.total) == (1, 2, 3)
+
+
+def test_deadline_nesting():
+    base = Timeouts(connect=1, read=2, total=3)
+    with deadline(total=10):
+        with deadline(connect=None):
+            assert current_timeouts(base) == Timeouts(connect=None, read=2, total=10)
+    assert current_timeouts(base) is base
+    with pytest.raises(TypeError):
+        with deadline(first_byte=1):
+            pass
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from aioresponses import aioresponses
+
+from bwt_api.api import BwtSilkApi
+from bwt_api.retry import CircuitBreaker
+from bwt_api.watch import AdaptiveInterval
+
+
+def test_adaptive_interval():
+    interval = AdaptiveInterval(min_interval=1, max_interval=5, backoff=2)
+    assert [interval.next(False) for _ in range(4)] == [2, 4, 5, 5]
+    assert interval.next(True) == 1
+    with pytest.raises(ValueError):
+        AdaptiveInterval(min_interval=0)
+
+
+async def test_silk_watch():
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    with aioresponses() as mocked:
+        for body in ('{"params":[1]}', '{"params":[1]}', '{"params":[2]}'):
+            mocked.get("http://host:80/silk/registers", status=200, body=body)
+        async with BwtSilkApi("host") as api:
+            watch = api.watch(min_interval=1, max_interval=8, sleep=fake_sleep)
+            values = [await anext(watch) for _ in range(3)]
+            await watch.aclose()
+    assert values == [[1], [1], [2]]
+    # Idle twice, then a change tightens the interval again
+    assert sleeps == [2, 4]
+
+
+async def test_silk_watch_retries_transient_errors(caplog):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        if len(sleeps) == 6:
+            raise asyncio.CancelledError
+
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", exception=TimeoutError())
+        mocked.get("http://host:80/silk/registers", status=500)
+        mocked.get("http://host:80/silk/registers", status=200, body='{"params":[1]}')
+        mocked.get("http://host:80/silk/registers", exception=TimeoutError(), repeat=True)
+        async with BwtSilkApi("host", circuit_breaker=CircuitBreaker(failure_threshold=2, cooldown=30)) as api:
+            watch = api.watch(min_interval=1, max_interval=8, sleep=fake_sleep)
+            assert await anext(watch) == [1]
+            with pytest.raises(asyncio.CancelledError):
+                await anext(watch)
+    # Idle backoff after the failures, then the open circuit holds the watch for its cooldown
+    assert sleeps[:5] == [2, 4, 8, 8, 8]
+    assert 8 < sleeps[5] <= 30
+    assert "Poll failed" in caplog.text
+
+
+async def test_silk_watch_raises_other_errors():
+    async def fake_sleep(delay):
+        pass
+
+    with aioresponses() as mocked:
+        mocked.get("http://host:80/silk/registers", status=200, body='{"registers":[1]}')
+        async with BwtSilkApi("host") as api:
+            with pytest.raises(KeyError):
+                await anext(api.watch(sleep=fake_sleep))